@@ -0,0 +1,119 @@
+import hashlib
+import json
+from collections import deque
+from typing import Any, Dict, List, Optional, Set
+
+
+REPEAT_LIMIT = 2
+PROGRESS_WINDOW = 3
+BUDGET_EXTENSION = 2
+STALL_GRACE = 2
+MAX_EMPTY_TURNS = 2
+# tools whose result says little ("written"), so new arguments count as new work
+WRITE_TOOLS = {"write_file", "create_folder"}
+
+
+def _digest(value: Any) -> str:
+    try:
+        text = json.dumps(value, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        text = repr(value)
+    return hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()
+
+
+class ConvergenceController:
+    """Decides after each ReAct iteration whether to continue, finish, redirect or stop.
+
+    - a turn with text and no tool calls is the final answer, except before
+      any tool has run: that is usually a plan, so the model is asked once to
+      act on it (or to confirm the task needs no changes)
+    - an iteration whose tool calls and results exactly repeat an earlier one
+      is a loop: the first time a given iteration repeats the model is
+      redirected, the next time the run stops
+    - an iteration is new work if it wrote something new or got a tool result
+      not seen before; the iteration budget grows while every recent
+      iteration is new work and shrinks to a short grace period once none is
+    """
+
+    def __init__(self, max_iterations: int, hard_limit: Optional[int] = None):
+        self.base_budget = max_iterations
+        self.budget = max_iterations
+        self.hard_limit = hard_limit or max_iterations * 2
+        self.fingerprints: Dict[str, int] = {}
+        self.progress = deque(maxlen=PROGRESS_WINDOW)
+        self.redirected: Set[str] = set()
+        self.seen_results: Set[str] = set()
+        self.empty_turns = 0
+        self.tools_run = False
+        self.plan_nudged = False
+        self._calls: List[str] = []
+        self._new_work = False
+
+    def record_tool(self, name: str, args: Dict[str, Any], result: Any):
+        self._calls.append(f"{name}:{_digest(args)}:{_digest(result)}")
+        key = f"{name}:{_digest(args if name in WRITE_TOOLS else result)}"
+        if key not in self.seen_results:
+            self.seen_results.add(key)
+            self._new_work = True
+
+    def end_iteration(self, iteration: int, has_text: bool, has_tool_calls: bool) -> Dict[str, Any]:
+        calls, self._calls = self._calls, []
+        new_work, self._new_work = self._new_work, False
+
+        if not has_tool_calls:
+            if has_text:
+                if not self.tools_run and not self.plan_nudged:
+                    self.plan_nudged = True
+                    return self._decision(
+                        "redirect",
+                        "Text-only turn before any tool call; asking the model to act on its plan",
+                        message=(
+                            "You replied without calling any tools. If the task needs changes, "
+                            "call the tools for your plan now, in this same turn. If it needs no "
+                            "changes, reply again with your final answer."
+                        )
+                    )
+                return self._decision("complete", "Text-only answer with no tool calls; treating it as final")
+            self.empty_turns += 1
+            self.progress.append(False)
+            if self.empty_turns >= MAX_EMPTY_TURNS:
+                return self._decision("stop", f"{self.empty_turns} empty turns in a row")
+            return self._adjust_budget(iteration)
+        self.empty_turns = 0
+        self.tools_run = True
+
+        fingerprint = _digest(sorted(calls))
+        seen = self.fingerprints.get(fingerprint, 0)
+        self.fingerprints[fingerprint] = seen + 1
+        self.progress.append(new_work)
+
+        if seen + 1 >= REPEAT_LIMIT:
+            if fingerprint not in self.redirected:
+                self.redirected.add(fingerprint)
+                return self._decision(
+                    "redirect",
+                    "Same tool calls produced the same results as an earlier iteration",
+                    message=(
+                        "You are repeating an earlier step: the same tool calls returned the same "
+                        "results. Do not repeat it. Try a different approach, or if the task is "
+                        "already done, reply with your final answer and no tool calls."
+                    )
+                )
+            return self._decision("stop", "Repeated the same tool calls and results after a redirect")
+
+        return self._adjust_budget(iteration)
+
+    def _adjust_budget(self, iteration: int) -> Dict[str, Any]:
+        window_full = len(self.progress) == PROGRESS_WINDOW
+        if window_full and all(self.progress) and iteration >= self.budget - 1 and self.budget < self.hard_limit:
+            self.budget = min(self.hard_limit, self.budget + BUDGET_EXTENSION)
+            return self._decision("continue", f"Steady progress; budget extended to {self.budget}")
+        if window_full and not any(self.progress) and self.budget > iteration + STALL_GRACE:
+            self.budget = iteration + STALL_GRACE
+            return self._decision("continue", f"No progress in {PROGRESS_WINDOW} iterations; budget cut to {self.budget}")
+        return self._decision("continue", "")
+
+    def _decision(self, action: str, reason: str, **extra: Any) -> Dict[str, Any]:
+        decision = {"action": action, "reason": reason, "budget": self.budget}
+        decision.update(extra)
+        return decision
@@ -0,0 +1,294 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+
+IGNORED_DIRS = {
+    ".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", "venv",
+    ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox", ".hypercode",
+    ".idea", ".vscode",
+}
+MAX_INDEX_ENTRIES = 200_000
+MAX_REPORTED_CHANGES = 50
+
+# (mtime_ns, size, inode)
+Signature = Tuple[int, int, int]
+
+
+class _TooLarge(Exception):
+    pass
+
+
+class _Inotify:
+    """Minimal ctypes binding to Linux inotify, used to find dirty directories."""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+
+    WATCH_MASK = (
+        IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+        | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+    )
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}
+        self.paths: Dict[str, int] = {}
+
+    @classmethod
+    def create(cls) -> Optional["_Inotify"]:
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            return cls()
+        except (OSError, AttributeError):
+            return None
+
+    def watch(self, path: Path, rel: str):
+        wd = self._add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                return
+            raise OSError(err, f"inotify_add_watch failed for {path}")
+        self.watches[wd] = rel
+        self.paths[rel] = wd
+
+    def forget(self, rel: str):
+        wd = self.paths.pop(rel, None)
+        if wd is not None:
+            self.watches.pop(wd, None)
+            self._rm_watch(self.fd, wd)
+
+    def read_dirty(self) -> Optional[Set[str]]:
+        """Directories with pending events, or None if the queue overflowed."""
+        dirty: Set[str] = set()
+        overflow = False
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + self.EVENT_HEADER.size <= len(buf):
+                wd, mask, _cookie, length = self.EVENT_HEADER.unpack_from(buf, offset)
+                offset += self.EVENT_HEADER.size + length
+                if mask & self.IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                if mask & self.IN_IGNORED:
+                    rel = self.watches.pop(wd, None)
+                    if rel is not None and self.paths.get(rel) == wd:
+                        del self.paths[rel]
+                    continue
+                rel = self.watches.get(wd)
+                if rel is not None:
+                    dirty.add(rel)
+        return None if overflow else dirty
+
+    def close(self):
+        os.close(self.fd)
+
+
+class WorkspaceIndex:
+    """mtime/size/inode index of a directory tree.
+
+    ``refresh()`` returns the files created, modified and deleted since the
+    previous call. On Linux, inotify narrows each refresh down to the
+    directories that saw events; elsewhere the tree is rescanned.
+    """
+
+    def __init__(self, root: str, max_entries: int = MAX_INDEX_ENTRIES, watch: bool = True):
+        self.root = Path(root).resolve()
+        self.max_entries = max_entries
+        self.files: Dict[str, Dict[str, Signature]] = {}
+        self.subdirs: Dict[str, Set[str]] = {}
+        self.entry_count = 0
+        self.disabled = False
+        self.lock = threading.Lock()
+        # bumped by every refresh that finds changes, so consumers can tell
+        # whether they're stale even when another caller consumed the changes
+        self.generation = 0
+        self._built = False
+        self._watcher = _Inotify.create() if watch else None
+
+    def refresh(self) -> Optional[Dict[str, List[str]]]:
+        with self.lock:
+            if self.disabled:
+                return None
+
+            changes = {"created": [], "modified": [], "deleted": []}
+            try:
+                if not self._built:
+                    self._scan("", changes, recursive=True)
+                    self._built = True
+                    self.generation += 1
+                    return changes
+
+                dirty = self._watcher.read_dirty() if self._watcher else None
+                if dirty is None:
+                    self._scan("", changes, recursive=True)
+                else:
+                    for rel in sorted(dirty):
+                        if rel in self.files:
+                            self._scan(rel, changes, recursive=False)
+            except _TooLarge:
+                self.disable()
+                return None
+            if any(changes.values()):
+                self.generation += 1
+            return changes
+
+    def iter_files(self):
+        """Yield ``(relpath, signature)`` for every indexed file."""
+        for rel, files in self.files.items():
+            for name, sig in files.items():
+                yield (os.path.join(rel, name) if rel else name), sig
+
+    def disable(self):
+        self.disabled = True
+        self.files.clear()
+        self.subdirs.clear()
+        self._close_watcher()
+
+    def _close_watcher(self):
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+
+    def _scan(self, rel: str, changes: Dict[str, List[str]], recursive: bool):
+        path = self.root / rel if rel else self.root
+        if self._watcher is not None:
+            try:
+                # watch before listing so nothing slips in between
+                self._watcher.watch(path, rel)
+            except OSError:
+                # out of watches; fall back to rescanning
+                self._close_watcher()
+
+        files: Dict[str, Signature] = {}
+        subdirs: Set[str] = set()
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            self._drop(rel, changes)
+            return
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in IGNORED_DIRS:
+                            subdirs.add(entry.name)
+                    else:
+                        st = entry.stat(follow_symlinks=False)
+                        files[entry.name] = (st.st_mtime_ns, st.st_size, st.st_ino)
+                except OSError:
+                    continue
+
+        # a directory we haven't seen before is new only once the index exists
+        previous = self.files.get(rel, {} if self._built else None)
+        if previous is not None:
+            for name, sig in files.items():
+                old = previous.get(name)
+                if old is None:
+                    changes["created"].append(os.path.join(rel, name) if rel else name)
+                elif old != sig:
+                    changes["modified"].append(os.path.join(rel, name) if rel else name)
+            for name in previous.keys() - files.keys():
+                changes["deleted"].append(os.path.join(rel, name) if rel else name)
+
+        self.entry_count += len(files) - len(previous or ())
+        if self.entry_count > self.max_entries:
+            raise _TooLarge()
+
+        old_subdirs = self.subdirs.get(rel, set())
+        self.files[rel] = files
+        self.subdirs[rel] = subdirs
+
+        for name in subdirs:
+            child = os.path.join(rel, name) if rel else name
+            if recursive or child not in self.files:
+                self._scan(child, changes, recursive)
+        for name in old_subdirs - subdirs:
+            self._drop(os.path.join(rel, name) if rel else name, changes)
+
+    def _drop(self, rel: str, changes: Dict[str, List[str]]):
+        files = self.files.pop(rel, {})
+        self.entry_count -= len(files)
+        for name in files:
+            changes["deleted"].append(os.path.join(rel, name) if rel else name)
+        for name in self.subdirs.pop(rel, set()):
+            self._drop(os.path.join(rel, name) if rel else name, changes)
+        if self._watcher is not None:
+            self._watcher.forget(rel)
+
+
+_indexes: Dict[Path, WorkspaceIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(root: str) -> Optional[WorkspaceIndex]:
+    """Shared index for ``root``, built on first use. None if the tree is too large."""
+    key = Path(root).resolve()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = WorkspaceIndex(str(key))
+    return None if index.disabled else index
+
+
+def forget_indexes(root: str):
+    """Drop cached indexes for ``root`` and anything below it (e.g. a removed clone)."""
+    key = Path(root).resolve()
+    with _indexes_lock:
+        stale = [path for path in _indexes if path == key or path.is_relative_to(key)]
+        for path in stale:
+            index = _indexes.pop(path)
+            with index.lock:
+                index.disable()
+
+
+def changes_under(changes: Dict[str, List[str]], prefix: str) -> Dict[str, List[str]]:
+    """Restrict a refresh() result to the ``prefix`` subtree, relative to it."""
+    if not prefix:
+        return changes
+    start = prefix.rstrip("/") + "/"
+    return {
+        kind: [rel[len(start):] for rel in paths if rel.startswith(start)]
+        for kind, paths in changes.items()
+    }
+
+
+def summarize_changes(changes: Dict[str, List[str]], root: Path) -> Dict[str, object]:
+    """Compact, model-facing form of a refresh() result."""
+    summary: Dict[str, object] = {"root": str(root)}
+    for kind in ("created", "modified", "deleted"):
+        paths = sorted(changes[kind])
+        summary[kind] = paths[:MAX_REPORTED_CHANGES]
+        if len(paths) > MAX_REPORTED_CHANGES:
+            summary[f"{kind}_truncated"] = len(paths) - MAX_REPORTED_CHANGES
+    return summary
@@ -0,0 +1,148 @@
+import os
+import sys
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional
+
+
+HISTORY_CAP_ENV = "HYPERCODE_HISTORY_MAX_MB"
+DEFAULT_HISTORY_CAP_MB = 16.0
+ARG_PREVIEW_CHARS = 50
+
+
+def format_size(size: float) -> str:
+    if size < 1024:
+        return f"{int(size)}B"
+    elif size < 1024 * 1024:
+        return f"{size/1024:.1f}KB"
+    elif size < 1024 * 1024 * 1024:
+        return f"{size/(1024*1024):.1f}MB"
+    return f"{size/(1024*1024*1024):.1f}GB"
+
+
+def process_rss() -> Optional[int]:
+    """Current resident set size in bytes, or None where it can't be read cheaply."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # peak rather than current, but the best we have without /proc
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def summarize_args(args: Dict[str, Any]) -> str:
+    arg_strs = []
+    for k, v in args.items():
+        v_str = str(v)
+        if len(v_str) > ARG_PREVIEW_CHARS:
+            v_str = v_str[:ARG_PREVIEW_CHARS - 3] + "..."
+        arg_strs.append(f"{k}={v_str}")
+    return ", ".join(arg_strs)
+
+
+class StepRecord:
+    """What StepDisplay renders for a step, without the raw tool payload."""
+
+    __slots__ = ("timestamp", "phase", "content", "tool", "args", "success", "iteration", "spill")
+
+    def __init__(self, timestamp: str, phase: str, content: str, data: Dict[str, Any]):
+        self.timestamp = timestamp
+        self.phase = sys.intern(phase)
+        self.content: Optional[str] = content
+        self.tool: Optional[str] = None
+        self.args: Optional[str] = None
+        self.success: Optional[bool] = None
+        self.iteration: Optional[int] = data.get("iteration")
+        self.spill: Optional[tuple] = None
+
+        if phase == "act" and "tool" in data:
+            self.tool = sys.intern(data["tool"])
+            self.args = summarize_args(data.get("args", {}))
+        if phase == "observe" and "result" in data:
+            result = data["result"]
+            if isinstance(result, dict) and "success" in result:
+                self.success = bool(result["success"])
+
+    def payload_size(self) -> int:
+        size = sys.getsizeof(self.content) if self.content is not None else 0
+        if self.args is not None:
+            size += sys.getsizeof(self.args)
+        return size
+
+
+class StepHistory:
+    """Step records with a cap on in-memory payload.
+
+    Once the content of retained steps exceeds ``max_bytes``, the oldest
+    payloads are moved to an anonymous temp file and read back on demand.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv(HISTORY_CAP_ENV, DEFAULT_HISTORY_CAP_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.records: List[StepRecord] = []
+        self.resident_bytes = 0
+        self.spilled_bytes = 0
+        self._spill_file = None
+        self._spill_cursor = 0  # index of the oldest record still resident
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[StepRecord]:
+        return iter(self.records)
+
+    def __bool__(self) -> bool:
+        return bool(self.records)
+
+    def append(self, record: StepRecord):
+        self.records.append(record)
+        self.resident_bytes += record.payload_size()
+        if self.resident_bytes > self.max_bytes:
+            self._evict()
+
+    def tail(self, count: int) -> List[StepRecord]:
+        return self.records[-count:]
+
+    def content(self, record: StepRecord) -> str:
+        if record.content is not None:
+            return record.content
+        offset, length = record.spill
+        self._spill_file.seek(offset)
+        return self._spill_file.read(length).decode("utf-8")
+
+    def clear(self):
+        self.records = []
+        self.resident_bytes = 0
+        self.spilled_bytes = 0
+        self._spill_cursor = 0
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def _evict(self):
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix="hypercode-steps-")
+        self._spill_file.seek(0, os.SEEK_END)
+
+        # evict down to three quarters of the cap so we don't spill on every step
+        target = self.max_bytes * 3 // 4
+        while self.resident_bytes > target and self._spill_cursor < len(self.records) - 1:
+            record = self.records[self._spill_cursor]
+            self._spill_cursor += 1
+            if record.content is None:
+                continue
+            size = sys.getsizeof(record.content)
+            encoded = record.content.encode("utf-8")
+            record.spill = (self._spill_file.tell(), len(encoded))
+            self._spill_file.write(encoded)
+            record.content = None
+            self.resident_bytes -= size
+            self.spilled_bytes += len(encoded)
+        self._spill_file.flush()
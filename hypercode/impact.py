@@ -0,0 +1,220 @@
+import ast
+import os
+import re
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from .fs_journal import Signature, get_index
+
+
+TEST_TIMEOUT = 120
+MAX_FAILURE_CHARS = 1500
+SUMMARY_LINE = re.compile(r"^=*\s*(.*\d+ (passed|failed|error|errors|skipped|deselected|no tests ran).*?)\s*=*$")
+
+
+def is_test_file(rel: str) -> bool:
+    name = os.path.basename(rel)
+    return name.endswith(".py") and (name.startswith("test_") or name.endswith("_test.py"))
+
+
+def _module_names(rel: str) -> List[str]:
+    """Dotted names a file may be imported as: every suffix of its package path.
+
+    ``src/pkg/mod.py`` -> ``src.pkg.mod``, ``pkg.mod``, ``mod``. Over-matching
+    only means a few extra tests get selected.
+    """
+    parts = rel[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return [".".join(parts[i:]) for i in range(len(parts))]
+
+
+def _imports(source: str, rel: str) -> Set[str]:
+    """Absolute dotted names referenced by the file's import statements.
+
+    Every parent package is included too: importing ``pkg.mod`` runs
+    ``pkg/__init__.py`` first.
+    """
+    try:
+        tree = ast.parse(source, filename=rel)
+    except SyntaxError:
+        return set()
+
+    package = rel[:-3].split("/")[:-1]
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package[:len(package) - (node.level - 1)]
+                module = ".".join(base + ([node.module] if node.module else []))
+            else:
+                module = node.module or ""
+            if module:
+                names.add(module)
+            # "from pkg import mod" may import a submodule
+            names.update(f"{module}.{alias.name}" if module else alias.name for alias in node.names)
+    return {
+        ".".join(parts[:i])
+        for parts in (name.split(".") for name in names)
+        for i in range(1, len(parts) + 1)
+    }
+
+
+class ImportGraph:
+    """Import-dependency graph of a workspace's Python files.
+
+    Built on the shared WorkspaceIndex and re-parsed only for files whose
+    mtime/size changed since the last call.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+        self.lock = threading.Lock()
+        self._files: Dict[str, Tuple[Signature, Set[str]]] = {}
+        self._generation = -1
+
+    def refresh(self) -> bool:
+        index = get_index(str(self.root))
+        # the index is shared, so its changes may already have been consumed
+        # by another caller; compare generations instead
+        if index is None or index.refresh() is None:
+            return False
+
+        with index.lock:
+            if index.generation == self._generation:
+                return True
+            self._generation = index.generation
+            current = {rel: sig for rel, sig in index.iter_files() if rel.endswith(".py")}
+        for rel in self._files.keys() - current.keys():
+            del self._files[rel]
+        for rel, sig in current.items():
+            cached = self._files.get(rel)
+            if cached is not None and cached[0] == sig:
+                continue
+            try:
+                source = (self.root / rel).read_text(encoding="utf-8", errors="replace")
+            except OSError:
+                continue
+            self._files[rel] = (sig, _imports(source, rel))
+        return True
+
+    def test_files(self) -> List[str]:
+        return sorted(rel for rel in self._files if is_test_file(rel))
+
+    def tests_near(self, changed: Iterable[str]) -> List[str]:
+        """Test files in (or below) the directories of changed files.
+
+        Changes at the workspace root don't select anything here; that would
+        be the whole suite.
+        """
+        dirs = {os.path.dirname(rel) for rel in changed} - {""}
+        return [t for t in self.test_files() if any(t.startswith(d + "/") for d in dirs)]
+
+    def affected_tests(self, changed: Iterable[str]) -> List[str]:
+        modules: Dict[str, Set[str]] = {}
+        for rel in self._files:
+            for name in _module_names(rel):
+                modules.setdefault(name, set()).add(rel)
+
+        dependents: Dict[str, Set[str]] = {}
+        for rel, (_sig, imports) in self._files.items():
+            for name in imports:
+                for target in modules.get(name, ()):
+                    if target != rel:
+                        dependents.setdefault(target, set()).add(rel)
+
+        changed = [rel for rel in changed if rel in self._files]
+        affected: Set[str] = set()
+        queue = list(changed)
+        while queue:
+            rel = queue.pop()
+            if rel not in affected:
+                affected.add(rel)
+                queue.extend(dependents.get(rel, ()))
+
+        tests = {rel for rel in affected if is_test_file(rel)}
+        # a changed conftest affects every test below it
+        for rel in changed:
+            if os.path.basename(rel) == "conftest.py":
+                prefix = os.path.dirname(rel)
+                tests.update(t for t in self.test_files() if not prefix or t.startswith(prefix + "/"))
+        return sorted(tests)
+
+
+_graphs: Dict[Path, ImportGraph] = {}
+_graphs_lock = threading.Lock()
+
+
+def get_import_graph(root: str) -> ImportGraph:
+    key = Path(root).resolve()
+    with _graphs_lock:
+        graph = _graphs.get(key)
+        if graph is None:
+            graph = _graphs[key] = ImportGraph(str(key))
+    return graph
+
+
+def _python_for(root: Path) -> str:
+    for candidate in (".venv/bin/python", "venv/bin/python", ".venv/Scripts/python.exe", "venv/Scripts/python.exe"):
+        if (root / candidate).exists():
+            return str(root / candidate)
+    return sys.executable
+
+
+def _run_test_file(python: str, root: Path, rel: str, timeout: int) -> Dict[str, Any]:
+    try:
+        result = subprocess.run(
+            [python, "-m", "pytest", "-q", "--tb=short", "-p", "no:cacheprovider", rel],
+            cwd=str(root),
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return {"file": rel, "passed": False, "summary": f"timed out after {timeout}s", "output": ""}
+
+    lines = result.stdout.strip().splitlines()
+    summary = next((m.group(1) for m in (SUMMARY_LINE.match(line) for line in reversed(lines)) if m), "")
+    # 5: no tests collected
+    passed = result.returncode in (0, 5)
+    failures = ""
+    if not passed:
+        output = result.stdout
+        start = output.find("= FAILURES =")
+        if start == -1:
+            start = output.find("= ERRORS =")
+        end = output.find("short test summary info")
+        failures = output[start if start != -1 else 0:end if end != -1 else len(output)]
+        if not failures.strip():
+            failures = result.stdout + result.stderr
+        failures = failures.strip().strip("=").strip()[-MAX_FAILURE_CHARS:]
+    return {
+        "file": rel,
+        "passed": passed,
+        "summary": summary or f"exit code {result.returncode}",
+        "output": failures
+    }
+
+
+def run_test_files(root: str, files: List[str], timeout: int = TEST_TIMEOUT) -> Dict[str, Any]:
+    """Run each test file in its own pytest process, in parallel."""
+    root_path = Path(root).resolve()
+    python = _python_for(root_path)
+    workers = max(1, min(len(files), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda rel: _run_test_file(python, root_path, rel, timeout), files))
+
+    failed = [r for r in results if not r["passed"]]
+    return {
+        "success": not failed,
+        "files_run": len(results),
+        "files_failed": len(failed),
+        "summary": {r["file"]: r["summary"] for r in results},
+        "failures": {r["file"]: r["output"] for r in failed}
+    }
@@ -1,5 +1,8 @@
 import sys
+from .metrics import dump_at_exit
+from .profiling import TaskProfiler
 from .react_agent import ReActAgent
+from .speculative import SpeculativeRun
 
 
 def print_step(phase: str, content: str, data: dict):
@@ -7,6 +10,8 @@ def print_step(phase: str, content: str, data: dict):
         "think": "💭",
         "act": "⚡",
         "observe": "👁️",
+        "verify": "🧪",
+        "control": "🧭",
         "complete": "✅"
     }
     symbol = phase_symbols.get(phase, "•")
@@ -19,23 +24,60 @@ def print_step(phase: str, content: str, data: dict):
                 print(f"   - {key}: {value}")
 
 
+def pop_option(args: list, name: str, default=None):
+    if name not in args:
+        return default
+    index = args.index(name)
+    value = args[index + 1] if index + 1 < len(args) else default
+    del args[index:index + 2]
+    return value
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python -m hypercode <task>")
-        print("   or: python -m hypercode.tui  (for TUI mode)")
+    args = sys.argv[1:]
+    profiler = TaskProfiler.from_env()
+    if "--profile" in args:
+        args.remove("--profile")
+        profiler.start()
+    
+    metrics_path = None
+    if "--metrics-json" in args:
+        metrics_path = pop_option(args, "--metrics-json", "hypercode-metrics.json")
+    dump_at_exit(metrics_path)
+    
+    try:
+        best_of = int(pop_option(args, "--best-of", "1"))
+    except ValueError:
+        best_of = 0
+    verify_command = pop_option(args, "--verify")
+    
+    if not args or best_of < 1 or (best_of > 1 and not verify_command):
+        print("Usage: python -m hypercode.main [--profile] [--metrics-json PATH] <task>")
+        print("       python -m hypercode.main --best-of N --verify CMD <task>")
+        print("   or: python -m hypercode [--profile]  (for TUI mode)")
         sys.exit(1)
     
-    task = " ".join(sys.argv[1:])
+    task = " ".join(args)
     print(f"🚀 Starting task: {task}\n")
     
-    agent = ReActAgent(on_step=print_step)
-    result = agent.run(task)
+    if best_of > 1:
+        print(f"Running {best_of} attempts, verifying with: {verify_command}")
+        if profiler.requested:
+            print("Profiling the first attempt only")
+        result = SpeculativeRun(
+            verify_command, attempts=best_of, on_step=print_step, profiler=profiler
+        ).run(task)
+    else:
+        agent = ReActAgent(on_step=print_step, profiler=profiler)
+        result = agent.run(task)
     
     print("\n" + "="*50)
     if result["success"]:
         print(f"✅ Task completed in {result['iterations']} iterations")
     else:
         print(f"⚠️  Task incomplete after {result['iterations']} iterations")
+    if "profile_report" in result:
+        print(f"Profile report: {result['profile_report']}")
     print("="*50)
 
 
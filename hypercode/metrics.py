@@ -0,0 +1,137 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+METRICS_JSON_ENV = "HYPERCODE_METRICS_JSON"
+
+# seconds; the last bucket catches everything above
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Latency samples with a bounded window for percentiles and fixed buckets for totals."""
+
+    def __init__(self, window: int = 1024, buckets: tuple = LATENCY_BUCKETS):
+        self.samples = deque(maxlen=window)
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+        for i, edge in enumerate(self.buckets):
+            if value <= edge:
+                self.bucket_counts[i] += 1
+                break
+        else:
+            self.bucket_counts[-1] += 1
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "buckets": dict(zip([str(edge) for edge in self.buckets] + ["inf"], self.bucket_counts)),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe in-process counters, gauges and histograms.
+
+    The agent records into it from its worker thread; the TUI reads snapshots
+    on a timer and headless runs can dump it as JSON.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def inc(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def tasks_per_hour(self) -> float:
+        with self._lock:
+            tasks = self.counters.get("tasks.completed", 0) + self.counters.get("tasks.failed", 0)
+        # floor at a minute so the first task doesn't report a silly rate
+        hours = max(time.time() - self.started, 60) / 3600
+        return tasks / hours
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            data = {
+                "uptime": time.time() - self.started,
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "histograms": {name: h.snapshot() for name, h in self.histograms.items()},
+            }
+        data["tasks_per_hour"] = self.tasks_per_hour()
+        return data
+
+    def histograms_with_prefix(self, prefix: str) -> List[tuple]:
+        with self._lock:
+            return [
+                (name[len(prefix):], h.snapshot())
+                for name, h in self.histograms.items()
+                if name.startswith(prefix)
+            ]
+
+    def dump_json(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(self.snapshot(), indent=2), encoding="utf-8")
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+
+def dump_at_exit(path: Optional[str] = None, registry: MetricsRegistry = REGISTRY):
+    path = path or os.getenv(METRICS_JSON_ENV)
+    if path:
+        atexit.register(registry.dump_json, path)
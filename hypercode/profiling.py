@@ -0,0 +1,211 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+PROFILE_ENV = "HYPERCODE_PROFILE"
+PROFILE_DIR_ENV = "HYPERCODE_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = ".hypercode/profiles"
+
+
+def _env_enabled(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _messages_size(messages: List[Any]) -> int:
+    total = 0
+    for message in messages:
+        content = getattr(message, "content", message)
+        total += len(content) if isinstance(content, str) else len(str(content))
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            total += len(str(tool_calls))
+    return total
+
+
+class TaskProfiler:
+    """Opt-in CPU and memory profiler for a single ReActAgent task.
+
+    cProfile runs in the agent thread and tracemalloc snapshots are taken at
+    iteration boundaries. Capture can be switched on or off while a task is
+    running; the change takes effect at the next iteration boundary.
+    """
+
+    def __init__(self, enabled: bool = False, output_dir: Optional[str] = None, top_n: int = 25):
+        self.requested = enabled
+        self.output_dir = Path(output_dir or os.getenv(PROFILE_DIR_ENV, DEFAULT_PROFILE_DIR))
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._profile: Optional[cProfile.Profile] = None
+        self._owns_tracemalloc = False
+        self._task = ""
+        self._task_report: Optional[Path] = None
+        self._reset_capture()
+
+    @classmethod
+    def from_env(cls) -> "TaskProfiler":
+        return cls(enabled=_env_enabled(PROFILE_ENV))
+
+    @property
+    def active(self) -> bool:
+        return self._profile is not None
+
+    def start(self):
+        self.requested = True
+
+    def stop(self):
+        self.requested = False
+
+    def _reset_capture(self):
+        self._capture_start = time.perf_counter()
+        self._iterations: List[Dict[str, Any]] = []
+        self._sections: Dict[str, List[float]] = {}
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def begin_task(self, task: str):
+        self._task = task
+        self._task_report = None
+        self._sync(None)
+
+    def iteration(self, iteration: int, messages: List[Any]):
+        self._sync(messages)
+        if not self.active:
+            return
+
+        snapshot = self._snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        growth = []
+        if self._last_snapshot is not None:
+            stats = snapshot.compare_to(self._last_snapshot, "lineno")
+            growth = [str(stat) for stat in stats[:5] if stat.size_diff > 0]
+        self._last_snapshot = snapshot
+
+        self._iterations.append({
+            "iteration": iteration,
+            "elapsed": time.perf_counter() - self._capture_start,
+            "traced_current": current,
+            "traced_peak": peak,
+            "messages": len(messages),
+            "messages_chars": _messages_size(messages),
+            "growth": growth,
+        })
+
+    def end_task(self, messages: List[Any]) -> Optional[Path]:
+        if self.active:
+            self.iteration(len(self._iterations) + 1, messages)
+            self._deactivate()
+        return self._task_report
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        if not self.active:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                entry = self._sections.setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+
+    def _sync(self, messages: Optional[List[Any]]):
+        # called from the agent thread, so cProfile attaches to the right thread
+        if self.requested and not self.active:
+            self._activate()
+        elif not self.requested and self.active:
+            if messages is not None:
+                current, peak = tracemalloc.get_traced_memory()
+                self._iterations.append({
+                    "iteration": "stop",
+                    "elapsed": time.perf_counter() - self._capture_start,
+                    "traced_current": current,
+                    "traced_peak": peak,
+                    "messages": len(messages),
+                    "messages_chars": _messages_size(messages),
+                    "growth": [],
+                })
+            self._deactivate()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    def _activate(self):
+        self._reset_capture()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        self._last_snapshot = self._snapshot()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def _deactivate(self):
+        profile = self._profile
+        self._profile = None
+        profile.disable()
+        try:
+            self._task_report = self._write_report(profile)
+        finally:
+            self._last_snapshot = None
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+
+    def _write_report(self, profile: cProfile.Profile) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^a-zA-Z0-9]+", "-", self._task)[:40].strip("-") or "task"
+        stem = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{slug}"
+        report_path = self.output_dir / f"{stem}.txt"
+        profile.dump_stats(str(self.output_dir / f"{stem}.prof"))
+
+        lines = [
+            f"Task: {self._task}",
+            f"Captured: {time.perf_counter() - self._capture_start:.2f}s",
+            "",
+            "== Sections (wall time) ==",
+        ]
+        with self._lock:
+            sections = sorted(self._sections.items(), key=lambda x: x[1][1], reverse=True)
+        for name, (count, total) in sections:
+            lines.append(f"{name:<32} calls={int(count):<5} total={total:.3f}s avg={total / count:.4f}s")
+        if not sections:
+            lines.append("(none)")
+
+        lines.append("")
+        lines.append("== Iterations ==")
+        previous = None
+        for entry in self._iterations:
+            delta = entry["traced_current"] - previous if previous is not None else 0
+            previous = entry["traced_current"]
+            lines.append(
+                f"iter {entry['iteration']}: t={entry['elapsed']:.2f}s "
+                f"traced={entry['traced_current'] / 1024:.1f}KB ({delta / 1024:+.1f}KB) "
+                f"peak={entry['traced_peak'] / 1024:.1f}KB "
+                f"messages={entry['messages']} ({entry['messages_chars']} chars)"
+            )
+            for line in entry["growth"]:
+                lines.append(f"    {line}")
+
+        lines.append("")
+        lines.append(f"== Top {self.top_n} functions (cumulative) ==")
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(self.top_n)
+        lines.append(stream.getvalue())
+
+        report_path.write_text("\n".join(lines), encoding="utf-8")
+        return report_path
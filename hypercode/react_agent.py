@@ -1,11 +1,17 @@
 import os
+import threading
+import time
 from typing import Any, Callable, Dict, List, Optional
 
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 
-from .tools import ALL_TOOLS
+from .convergence import ConvergenceController
+from .metrics import REGISTRY, MetricsRegistry
+from .profiling import TaskProfiler
+from .tools import ALL_TOOLS, track_changed_files, use_workspace
+from .workspace_map import get_workspace_map
 
 load_dotenv()
 
@@ -14,13 +20,25 @@ class ReActAgent:
     def __init__(
         self,
         max_iterations: int = 15,
-        on_step: Optional[Callable[[str, str, Any], None]] = None
+        on_step: Optional[Callable[[str, str, Any], None]] = None,
+        profiler: Optional[TaskProfiler] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        workspace: str = ".",
+        include_workspace_map: bool = True,
+        temperature: float = 0.1,
+        workspace_origin: Optional[str] = None
     ):
         self.max_iterations = max_iterations
         self.on_step = on_step or (lambda *args: None)
+        self.profiler = profiler or TaskProfiler.from_env()
+        self.metrics = metrics or REGISTRY
+        self.workspace = workspace
+        self.workspace_origin = workspace_origin
+        self.include_workspace_map = include_workspace_map
+        self.cancelled = threading.Event()
         self.llm = ChatGoogleGenerativeAI(
             model="gemini-2.5-flash",
-            temperature=0.1,
+            temperature=temperature,
             google_api_key=os.getenv("GOOGLE_API_KEY")
         )
         self.llm_with_tools = self.llm.bind_tools(ALL_TOOLS)
@@ -39,16 +57,22 @@ Available tools:
 - read_file: Read the contents of a file
 - write_file: Write or create a file with content
 - create_folder: Create a directory
-- run_command: Execute a shell command
+- run_command: Execute a shell command (reports files it created, modified or deleted in 'fs_changes')
+- code_outline: List classes, functions and methods in a Python file with signatures and line spans
+- read_symbol: Read the source of a single class, function or method from a Python file
+- run_tests: Run the tests affected by the files you changed, in parallel (failing tracebacks only)
 
 CRITICAL GUIDELINES:
-- ALWAYS provide your reasoning as text BEFORE calling any tools
+- In every turn that takes an action, give your reasoning as text AND call the tools in that same turn
 - Explain what you're thinking and why you're choosing specific actions
-- Your text response should describe your plan before you execute it
+- Never reply with only a plan: a reply without tool calls is treated as your final answer
 - After observing tool results, explain what you learned and what to do next
 - When writing code, make it clean, well-documented, and functional
 - Complete the task efficiently - don't take unnecessary actions
-- When the task is complete, clearly state "TASK COMPLETE" in your response
+- Use a command's 'fs_changes' instead of re-listing directories to see what it changed
+- For Python files, use code_outline and read_symbol instead of reading whole modules
+- To check your work, use run_tests rather than running the whole test suite with run_command
+- When the task is complete, reply with a short summary and no tool calls (or state "TASK COMPLETE")
 
 Example format:
 "I need to create a file with specific content. I'll use the write_file tool to create test.txt with the message."
@@ -56,24 +80,80 @@ Example format:
 
 Remember: Think out loud, explain your reasoning, then act."""
 
+    def _create_workspace_context(self) -> str:
+        if not self.include_workspace_map:
+            return ""
+        with self.profiler.section("workspace.map"):
+            workspace_map = get_workspace_map(self.workspace).render()
+        if not workspace_map:
+            return ""
+        return f"""
+
+WORKSPACE MAP (current snapshot of the working directory; use it to orient instead of listing directories):
+{workspace_map}"""
+
+    def cancel(self):
+        """Stop at the next iteration or tool boundary. Safe to call from any thread."""
+        self.cancelled.set()
+
     def run(self, task: str) -> Dict[str, Any]:
+        self.profiler.begin_task(task)
+        result = None
+        try:
+            with use_workspace(self.workspace, self.workspace_origin), track_changed_files():
+                result = self._run(task)
+        finally:
+            report = self.profiler.end_task(self.messages)
+            succeeded = result is not None and result["success"]
+            self.metrics.inc("tasks.completed" if succeeded else "tasks.failed")
+        
+        if report:
+            result["profile_report"] = str(report)
+        return result
+
+    def _run(self, task: str) -> Dict[str, Any]:
         self.messages = [
-            SystemMessage(content=self._create_system_prompt()),
+            SystemMessage(content=self._create_system_prompt() + self._create_workspace_context()),
             HumanMessage(content=f"Task: {task}")
         ]
         
         iteration = 0
         task_complete = False
+        stop_reason = None
+        tokens_in = tokens_out = 0
+        llm_seconds = 0.0
+        self.convergence = ConvergenceController(self.max_iterations)
         
-        while iteration < self.max_iterations and not task_complete:
+        while iteration < self.convergence.budget and not task_complete:
+            if self.cancelled.is_set():
+                break
             iteration += 1
+            self.profiler.iteration(iteration, self.messages)
+            self.metrics.inc("agent.iterations")
             
             # THINK
             self.on_step("think", f"Iteration {iteration}", {"iteration": iteration})
             
-            response = self.llm_with_tools.invoke(self.messages)
+            started = time.perf_counter()
+            with self.profiler.section("llm.invoke"):
+                response = self.llm_with_tools.invoke(self.messages)
+            elapsed = time.perf_counter() - started
             self.messages.append(response)
             
+            # metrics
+            llm_seconds += elapsed
+            usage = getattr(response, "usage_metadata", None) or {}
+            tokens_in += usage.get("input_tokens", 0)
+            tokens_out += usage.get("output_tokens", 0)
+            self.metrics.observe("llm.latency", elapsed)
+            self.metrics.inc("llm.tokens_in", usage.get("input_tokens", 0))
+            self.metrics.inc("llm.tokens_out", usage.get("output_tokens", 0))
+            self.metrics.set_gauge("prompt.tokens", usage.get("input_tokens", 0))
+            self.metrics.set_gauge("prompt.messages", len(self.messages) - 1)
+            self.metrics.set_gauge("task.tokens_in", tokens_in)
+            self.metrics.set_gauge("task.tokens_out", tokens_out)
+            self.metrics.set_gauge("task.tokens_per_sec", tokens_out / llm_seconds if llm_seconds else 0)
+            
             thinking = response.content if response.content else ""
             if thinking.strip():
                 self.on_step("think", thinking, {"iteration": iteration, "has_content": True})
@@ -93,6 +173,8 @@ Remember: Think out loud, explain your reasoning, then act."""
             # ACT
             if response.tool_calls:
                 for tool_call in response.tool_calls:
+                    if self.cancelled.is_set():
+                        break
                     tool_name = tool_call["name"]
                     tool_args = tool_call["args"]
                     tool_id = tool_call["id"]
@@ -106,7 +188,9 @@ Remember: Think out loud, explain your reasoning, then act."""
                     if tool_name in self.tools_map:
                         tool = self.tools_map[tool_name]
                         try:
-                            result = tool.invoke(tool_args)
+                            with self.profiler.section(f"tool.{tool_name}"), \
+                                    self.metrics.timer(f"tool.latency.{tool_name}"):
+                                result = tool.invoke(tool_args)
                             
                             # OBSERVE
                             self.on_step(
@@ -114,16 +198,19 @@ Remember: Think out loud, explain your reasoning, then act."""
                                 f"Result from {tool_name}",
                                 {"tool": tool_name, "result": result}
                             )
+                            self.convergence.record_tool(tool_name, tool_args, result)
                             
-                            self.messages.append(
-                                ToolMessage(
-                                    content=str(result),
-                                    tool_call_id=tool_id
+                            with self.profiler.section("messages.serialize"):
+                                self.messages.append(
+                                    ToolMessage(
+                                        content=str(result),
+                                        tool_call_id=tool_id
+                                    )
                                 )
-                            )
                         except Exception as e:
                             error_msg = f"Error executing {tool_name}: {str(e)}"
                             self.on_step("observe", error_msg, {"error": str(e)})
+                            self.convergence.record_tool(tool_name, tool_args, error_msg)
                             self.messages.append(
                                 ToolMessage(
                                     content=error_msg,
@@ -133,29 +220,59 @@ Remember: Think out loud, explain your reasoning, then act."""
                     else:
                         error_msg = f"Unknown tool: {tool_name}"
                         self.on_step("observe", error_msg, {"error": error_msg})
+                        self.convergence.record_tool(tool_name, tool_args, error_msg)
                         self.messages.append(
                             ToolMessage(
                                 content=error_msg,
                                 tool_call_id=tool_id
                             )
                         )
-            else:
+            elif not thinking.strip():
                 # no toolcalls, but not complete
-                if not task_complete:
-                    self.on_step(
-                        "think",
-                        "No action taken, continuing...",
-                        {"iteration": iteration}
-                    )
+                self.on_step(
+                    "think",
+                    "No action taken, continuing...",
+                    {"iteration": iteration}
+                )
+            
+            # CONVERGE
+            decision = self.convergence.end_iteration(
+                iteration, bool(thinking.strip()), bool(response.tool_calls)
+            )
+            if decision["reason"]:
+                self.on_step("control", decision["reason"], {"iteration": iteration, **decision})
+            
+            if decision["action"] == "complete":
+                task_complete = True
+                self.on_step("complete", thinking, {"iteration": iteration})
+            elif decision["action"] == "redirect":
+                self.messages.append(HumanMessage(content=decision["message"]))
+            elif decision["action"] == "stop":
+                stop_reason = decision["reason"]
+                break
         
         # final result
-        if task_complete:
+        if self.cancelled.is_set() and not task_complete:
+            return {
+                "success": False,
+                "result": "Cancelled",
+                "iterations": iteration,
+                "cancelled": True
+            }
+        elif task_complete:
             return {
                 "success": True,
                 "result": "Task completed successfully",
                 "iterations": iteration,
                 "final_message": thinking
             }
+        elif stop_reason:
+            return {
+                "success": False,
+                "result": f"Stopped: {stop_reason}",
+                "iterations": iteration,
+                "stopped": True
+            }
         else:
             return {
                 "success": False,
@@ -0,0 +1,363 @@
+import atexit
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .fs_journal import WorkspaceIndex, summarize_changes
+from .profiling import TaskProfiler
+from .react_agent import ReActAgent
+from .workspace_map import forget_workspace_maps
+
+
+# heavy dependency directories shared into each clone via symlink instead of
+# copied: a copied venv's scripts keep shebangs pointing at the original
+# interpreter anyway, so copying cost latency without isolating installs
+SHARED_DIRS = {"node_modules", ".venv", "venv"}
+# left out of clones entirely; .git in particular must not be shared between attempts
+SKIPPED_DIRS = {
+    ".git", ".hg", ".svn", "__pycache__", ".mypy_cache", ".pytest_cache",
+    ".ruff_cache", ".tox", ".nox", ".hypercode",
+}
+ATTEMPT_TEMPERATURES = (0.1, 0.5, 0.8, 1.0)
+VERIFY_TIMEOUT = 300
+VERIFY_OUTPUT_CHARS = 2000
+VERIFY_POLL_INTERVAL = 0.2
+
+
+def clone_workspace(source: Path, dest: Path):
+    """Copy ``source`` into ``dest``, using reflinks where the filesystem supports them.
+
+    Hardlinks aren't used: tools and commands write files in place, which
+    would write through to the original. ``SHARED_DIRS`` are symlinked, so
+    installing into them from an attempt does change the original.
+    """
+    dest.mkdir(parents=True)
+    copied = []
+    for entry in os.scandir(source):
+        if entry.name in SKIPPED_DIRS:
+            continue
+        if entry.name in SHARED_DIRS and entry.is_dir(follow_symlinks=False):
+            os.symlink(entry.path, dest / entry.name, target_is_directory=True)
+            continue
+        copied.append(entry.path)
+
+    if not copied:
+        return
+    if sys.platform.startswith("linux") and shutil.which("cp"):
+        # GNU cp clones extents on btrfs/xfs and silently falls back to a copy elsewhere
+        result = subprocess.run(
+            ["cp", "-a", "--reflink=auto", *copied, str(dest)],
+            capture_output=True,
+            text=True
+        )
+        if result.returncode == 0:
+            return
+
+    for path in copied:
+        target = dest / os.path.basename(path)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.copytree(path, target, symlinks=True, dirs_exist_ok=True,
+                            ignore=shutil.ignore_patterns(*SKIPPED_DIRS))
+        else:
+            shutil.copy2(path, target, follow_symlinks=False)
+
+
+def merge_back(clone: Path, source: Path, changes: Dict[str, List[str]]):
+    """Apply an attempt's file changes to ``source``.
+
+    Deletions go first so a path can change type: a file replaced by a
+    directory shows up as ``deleted: [foo]`` plus ``created: [foo/x]``.
+    """
+    for rel in changes["deleted"]:
+        target = source / rel
+        try:
+            target.unlink()
+        except FileNotFoundError:
+            pass
+        _prune_empty_dirs(clone, source, target.parent)
+
+    for rel in changes["created"] + changes["modified"]:
+        target = source / rel
+        # anything in the way that is a file in source but a directory in the clone
+        for parent in reversed(Path(rel).parents[:-1]):
+            existing = source / parent
+            if existing.is_symlink() or existing.is_file():
+                existing.unlink()
+        if target.is_dir() and not target.is_symlink():
+            # a directory replaced by a file; rmtree also drops ignored leftovers like __pycache__
+            shutil.rmtree(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(clone / rel, target, follow_symlinks=False)
+
+
+def _prune_empty_dirs(clone: Path, source: Path, directory: Path):
+    """Remove directories the merge emptied, unless the clone still has them."""
+    while directory != source and not (clone / directory.relative_to(source)).is_dir():
+        try:
+            directory.rmdir()
+        except OSError:
+            return
+        directory = directory.parent
+
+
+def _kill(process: subprocess.Popen):
+    # the shell's children (test runners, builds) are in the same session
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+    try:
+        process.communicate(timeout=5)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+def verify(
+    command: str,
+    cwd: Path,
+    timeout: int = VERIFY_TIMEOUT,
+    cancelled: Optional[threading.Event] = None
+) -> Dict[str, Any]:
+    """Run ``command`` in ``cwd``; kills it on timeout or once ``cancelled`` is set."""
+    process = subprocess.Popen(
+        command,
+        shell=True,
+        cwd=str(cwd),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        start_new_session=True
+    )
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            stdout, stderr = process.communicate(timeout=VERIFY_POLL_INTERVAL)
+            break
+        except subprocess.TimeoutExpired:
+            if cancelled is not None and cancelled.is_set():
+                _kill(process)
+                return {"passed": False, "cancelled": True, "output": "Verifier cancelled"}
+            if time.monotonic() >= deadline:
+                _kill(process)
+                return {
+                    "passed": False,
+                    "output": f"Verifier timed out after {timeout} seconds"
+                }
+
+    output = (stdout + stderr)[-VERIFY_OUTPUT_CHARS:]
+    return {
+        "passed": process.returncode == 0,
+        "return_code": process.returncode,
+        "output": output
+    }
+
+
+class SpeculativeRun:
+    """Best-of-N: run several agents on the same task in cloned workspaces.
+
+    Each attempt works in its own copy of the workspace. When an attempt
+    finishes, ``verify_command`` runs in its clone; the first one that passes
+    is merged back into the real workspace and the rest are cancelled.
+
+    cProfile and tracemalloc are process-wide, so at most one attempt can be
+    profiled: ``profiler`` goes to the first attempt and the others run with
+    profiling disabled.
+    """
+
+    def __init__(
+        self,
+        verify_command: str,
+        attempts: int = 3,
+        workspace: str = ".",
+        max_iterations: int = 15,
+        on_step: Optional[Callable[[str, str, Any], None]] = None,
+        verify_timeout: int = VERIFY_TIMEOUT,
+        profiler: Optional[TaskProfiler] = None
+    ):
+        self.verify_command = verify_command
+        self.attempts = attempts
+        self.workspace = Path(workspace).resolve()
+        self.max_iterations = max_iterations
+        self.on_step = on_step or (lambda *args: None)
+        self.verify_timeout = verify_timeout
+        self.profiler = profiler
+        self.agents: Dict[int, ReActAgent] = {}
+        # set only once the winning attempt has been merged
+        self.winner: Optional[int] = None
+        self._claimed: Optional[int] = None
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        self._pending = attempts
+        self._base: Optional[Path] = None
+
+    def cancel(self):
+        self.done.set()
+        with self._lock:
+            agents = list(self.agents.values())
+        for agent in agents:
+            agent.cancel()
+
+    def run(self, task: str) -> Dict[str, Any]:
+        self._base = Path(tempfile.mkdtemp(prefix="hypercode-spec-"))
+        # losers may still be inside a model call when the process exits
+        atexit.register(shutil.rmtree, self._base, True)
+        finished: "queue.Queue[tuple]" = queue.Queue()
+        for i in range(self.attempts):
+            # daemon threads: a cancelled loser mustn't keep the interpreter alive
+            threading.Thread(
+                target=self._run_attempt,
+                args=(i, task, finished),
+                name=f"hypercode-attempt-{i}",
+                daemon=True
+            ).start()
+
+        results: Dict[int, Dict[str, Any]] = {}
+        try:
+            while len(results) < self.attempts and self._claimed not in results:
+                index, result = finished.get()
+                results[index] = result
+        finally:
+            # losers notice at their next iteration boundary; don't wait for them
+            self.cancel()
+
+        if self.winner is not None:
+            winning = results[self.winner]
+            summary = {
+                "success": True,
+                "result": f"Attempt {self.winner + 1} passed verification and was merged",
+                "winner": self.winner,
+                "iterations": winning.get("iterations", 0),
+                "fs_changes": winning.get("fs_changes"),
+                "verify": winning.get("verify"),
+                "attempts": results
+            }
+        elif self._claimed is not None:
+            failed = results[self._claimed]
+            summary = {
+                "success": False,
+                "result": f"Attempt {self._claimed + 1} passed verification but {failed['error']}",
+                "iterations": failed.get("iterations", 0),
+                "verify": failed.get("verify"),
+                "attempts": results
+            }
+        else:
+            summary = {
+                "success": False,
+                "result": f"No attempt passed `{self.verify_command}`",
+                "iterations": max((r.get("iterations", 0) for r in results.values()), default=0),
+                "attempts": results
+            }
+        if "profile_report" in results.get(0, {}):
+            summary["profile_report"] = results[0]["profile_report"]
+        return summary
+
+    def _run_attempt(self, index: int, task: str, finished: "queue.Queue[tuple]"):
+        try:
+            result = self._attempt(index, task)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        finished.put((index, result))
+
+    def _attempt(self, index: int, task: str) -> Dict[str, Any]:
+        clone = self._base / f"attempt-{index}"
+        try:
+            if self.done.is_set():
+                return {"success": False, "cancelled": True}
+            clone_workspace(self.workspace, clone)
+            baseline = WorkspaceIndex(str(clone), watch=False)
+            baseline.refresh()
+
+            agent = ReActAgent(
+                max_iterations=self.max_iterations,
+                on_step=self._tagged_step(index),
+                temperature=ATTEMPT_TEMPERATURES[index % len(ATTEMPT_TEMPERATURES)],
+                # never from_env(): concurrent attempts can't all profile
+                profiler=(self.profiler if index == 0 else None) or TaskProfiler(),
+                workspace=str(clone),
+                workspace_origin=str(self.workspace)
+            )
+            with self._lock:
+                self.agents[index] = agent
+            if self.done.is_set():
+                return {"success": False, "cancelled": True}
+
+            result = agent.run(task)
+            if self.done.is_set():
+                result["cancelled"] = True
+                return result
+            # diff before verifying so verifier artifacts (.coverage, build/, ...) aren't merged
+            changes = baseline.refresh() or {"created": [], "modified": [], "deleted": []}
+
+            self.on_step("verify", f"[attempt {index + 1}] Running {self.verify_command}", {"attempt": index})
+            result["verify"] = verify(self.verify_command, clone, self.verify_timeout, self.done)
+            if result["verify"].get("cancelled"):
+                result["cancelled"] = True
+                return result
+            if not result["verify"]["passed"]:
+                self.on_step("verify", f"[attempt {index + 1}] Verification failed", {
+                    "attempt": index,
+                    "result": {"success": False}
+                })
+                return result
+
+            with self._lock:
+                if self._claimed is not None:
+                    result["cancelled"] = True
+                    return result
+                self._claimed = index
+            # cancel the others before merging so they stop spending tokens
+            self.cancel()
+            try:
+                merge_back(clone, self.workspace, changes)
+            except OSError as e:
+                # the clone is the only complete copy of the verified work now
+                kept = self._keep_clone(clone)
+                result["success"] = False
+                result["error"] = f"merging it back failed ({e}); its workspace was kept at {kept}"
+                result["kept_clone"] = str(kept)
+                self.on_step("verify", f"[attempt {index + 1}] Verification passed, but {result['error']}", {
+                    "attempt": index,
+                    "result": {"success": False}
+                })
+                return result
+
+            with self._lock:
+                self.winner = index
+            result["fs_changes"] = summarize_changes(changes, self.workspace)
+            self.on_step("verify", f"[attempt {index + 1}] Verification passed, merged", {
+                "attempt": index,
+                "result": {"success": True, "fs_changes": result["fs_changes"]}
+            })
+            return result
+        finally:
+            shutil.rmtree(clone, ignore_errors=True)
+            forget_workspace_maps(str(clone))
+            with self._lock:
+                self._pending -= 1
+                last = self._pending == 0
+            if last:
+                shutil.rmtree(self._base, ignore_errors=True)
+
+    def _keep_clone(self, clone: Path) -> Path:
+        kept = Path(tempfile.mkdtemp(prefix="hypercode-unmerged-")) / clone.name
+        try:
+            clone.rename(kept)
+        except OSError:
+            shutil.copytree(clone, kept, symlinks=True)
+        return kept
+
+    def _tagged_step(self, index: int) -> Callable[[str, str, Any], None]:
+        def on_step(phase: str, content: str, data: Dict[str, Any]):
+            self.on_step(phase, f"[attempt {index + 1}] {content}", {**data, "attempt": index})
+        return on_step
@@ -0,0 +1,129 @@
+import ast
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+MAX_CACHED_FILES = 256
+
+
+def _signature(node: ast.AST) -> str:
+    if isinstance(node, ast.ClassDef):
+        bases = [ast.unparse(base) for base in node.bases]
+        bases += [ast.unparse(keyword) for keyword in node.keywords]
+        return f"class {node.name}({', '.join(bases)})" if bases else f"class {node.name}"
+
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    signature = f"{prefix} {node.name}({ast.unparse(node.args)})"
+    if node.returns is not None:
+        signature += f" -> {ast.unparse(node.returns)}"
+    return signature
+
+
+def _collect(body: List[ast.stmt], parent: Optional[str], in_class: bool, symbols: List[Dict[str, Any]]):
+    for node in body:
+        if not isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            # definitions under if/try/with/for/match (TYPE_CHECKING, version
+            # guards, ImportError fallbacks) belong to the enclosing scope
+            for field in ("body", "orelse", "finalbody"):
+                _collect(getattr(node, field, []), parent, in_class, symbols)
+            for clause in getattr(node, "handlers", []) + getattr(node, "cases", []):
+                _collect(clause.body, parent, in_class, symbols)
+            continue
+
+        name = f"{parent}.{node.name}" if parent else node.name
+        if isinstance(node, ast.ClassDef):
+            kind = "class"
+        else:
+            kind = "method" if in_class else "function"
+        start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+        symbols.append({
+            "name": name,
+            "kind": kind,
+            "signature": _signature(node),
+            "start_line": start,
+            "end_line": node.end_lineno,
+            "depth": name.count("."),
+        })
+        _collect(node.body, name, isinstance(node, ast.ClassDef), symbols)
+
+
+def parse_symbols(source: str, filename: str = "<unknown>") -> List[Dict[str, Any]]:
+    symbols: List[Dict[str, Any]] = []
+    _collect(ast.parse(source, filename=filename).body, None, False, symbols)
+    return symbols
+
+
+class SymbolCache:
+    """Parsed symbols per file, shared across agent runs in the process.
+
+    Entries are reused while the file's mtime and size are unchanged; if those
+    change but the content hash doesn't, the parse is kept as well.
+    """
+
+    def __init__(self, max_files: int = MAX_CACHED_FILES):
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Path, Tuple[Tuple[int, int], str, List[str], List[Dict[str, Any]]]]" = OrderedDict()
+
+    def get(self, file_path: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Return ``(lines, symbols)`` for a Python file. Raises OSError/SyntaxError."""
+        path = Path(file_path).resolve()
+        st = path.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(path)
+                return entry[2], entry[3]
+
+        data = path.read_bytes()
+        digest = hashlib.sha1(data).hexdigest()
+        if entry is not None and entry[1] == digest:
+            lines, symbols = entry[2], entry[3]
+        else:
+            source = data.decode("utf-8")
+            symbols = parse_symbols(source, str(path))
+            # ast counts only \n/\r\n line breaks; str.splitlines() also splits on \f, \u2028, ...
+            lines = [line.rstrip("\r") for line in source.split("\n")]
+            if lines and lines[-1] == "":
+                lines.pop()
+
+        with self._lock:
+            self._entries[path] = (stamp, digest, lines, symbols)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_files:
+                self._entries.popitem(last=False)
+        return lines, symbols
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+SYMBOL_CACHE = SymbolCache()
+
+
+def format_outline(symbols: List[Dict[str, Any]]) -> str:
+    return "\n".join(
+        f"{'  ' * symbol['depth']}{symbol['signature']}  [L{symbol['start_line']}-{symbol['end_line']}]"
+        for symbol in symbols
+    )
+
+
+def find_symbol(symbols: List[Dict[str, Any]], name: str) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """Match a qualified name (``Class.method``) or, failing that, a bare name.
+
+    Returns the match and, when a bare name is ambiguous, the candidates.
+    """
+    for symbol in symbols:
+        if symbol["name"] == name:
+            return symbol, []
+
+    candidates = [s for s in symbols if s["name"].rsplit(".", 1)[-1] == name]
+    if len(candidates) == 1:
+        return candidates[0], []
+    return None, [s["name"] for s in candidates]
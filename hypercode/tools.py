@@ -1,10 +1,79 @@
 import os
 import subprocess
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 from langchain_core.tools import tool
 
+from .fs_journal import changes_under, get_index, summarize_changes
+from .impact import get_import_graph, run_test_files
+from .symbols import SYMBOL_CACHE, find_symbol, format_outline
+
+
+# (root, origin) for the agent running in this thread; see use_workspace()
+_workspace: ContextVar[Tuple[Optional[Path], Optional[Path]]] = ContextVar(
+    "hypercode_workspace", default=(None, None)
+)
+
+
+@contextmanager
+def use_workspace(root: str, origin: Optional[str] = None) -> Iterator[None]:
+    """Resolve tool paths against ``root`` for the current thread.
+
+    Absolute paths under ``origin`` are rebased onto ``root``, so an agent
+    working in a cloned workspace can't write through to the original.
+    """
+    token = _workspace.set((Path(root).resolve(), Path(origin).resolve() if origin else None))
+    try:
+        yield
+    finally:
+        _workspace.reset(token)
+
+
+# files written by the agent running in this thread; see track_changed_files()
+_changed_files: ContextVar[Optional[Set[str]]] = ContextVar("hypercode_changed_files", default=None)
+
+
+@contextmanager
+def track_changed_files() -> Iterator[Set[str]]:
+    """Collect the absolute paths of files written by tools for the current thread."""
+    changed: Set[str] = set()
+    token = _changed_files.set(changed)
+    try:
+        yield changed
+    finally:
+        _changed_files.reset(token)
+
+
+def _record_change(path: Path):
+    changed = _changed_files.get()
+    if changed is not None:
+        changed.add(str(path))
+
+
+def workspace_root() -> Path:
+    root, _origin = _workspace.get()
+    return root if root is not None else Path.cwd().resolve()
+
+
+def resolve_path(path: str) -> Path:
+    root, origin = _workspace.get()
+    candidate = Path(path).expanduser()
+    if root is None:
+        return candidate.resolve()
+    if not candidate.is_absolute():
+        return (root / candidate).resolve()
+    
+    resolved = candidate.resolve()
+    if origin is not None and not resolved.is_relative_to(root):
+        try:
+            return root / resolved.relative_to(origin)
+        except ValueError:
+            pass
+    return resolved
+
 
 @tool
 def read_file(file_path: str) -> Dict[str, Any]:
@@ -17,7 +86,7 @@ def read_file(file_path: str) -> Dict[str, Any]:
         Dictionary with 'success', 'content', and optional 'error' keys
     """
     try:
-        path = Path(file_path).resolve()
+        path = resolve_path(file_path)
         if not path.exists():
             return {
                 "success": False,
@@ -49,11 +118,12 @@ def write_file(file_path: str, content: str) -> Dict[str, Any]:
         Dictionary with 'success', 'path', and optional 'error' keys
     """
     try:
-        path = Path(file_path).resolve()
+        path = resolve_path(file_path)
         path.parent.mkdir(parents=True, exist_ok=True)
         is_new = not path.exists()
         
         path.write_text(content, encoding='utf-8')
+        _record_change(path)
         return {
             "success": True,
             "path": str(path),
@@ -77,7 +147,7 @@ def create_folder(folder_path: str) -> Dict[str, Any]:
         Dictionary with 'success', 'path', and optional 'error' keys
     """
     try:
-        path = Path(folder_path).resolve()
+        path = resolve_path(folder_path)
         path.mkdir(parents=True, exist_ok=True)
         return {
             "success": True,
@@ -94,13 +164,29 @@ def create_folder(folder_path: str) -> Dict[str, Any]:
 def run_command(command: str, cwd: str = ".") -> Dict[str, Any]:
     """Run a shell command and return the output.
     
+    Files the command created, modified or deleted under cwd (within the
+    workspace) are reported in 'fs_changes', so there is no need to re-list
+    directories afterwards.
+    
     Args:
         command: The command to execute
         cwd: Working directory for the command (default: current directory)
         
     Returns:
-        Dictionary with 'success', 'stdout', 'stderr', 'return_code' keys
+        Dictionary with 'success', 'stdout', 'stderr', 'return_code' and
+        optional 'fs_changes' keys
     """
+    cwd_path = resolve_path(cwd)
+    cwd = str(cwd_path)
+    
+    # one journal per workspace; commands run outside it aren't tracked
+    root = workspace_root()
+    index = None
+    if cwd_path.is_dir() and cwd_path.is_relative_to(root):
+        index = get_index(str(root))
+    if index is not None:
+        index.refresh()
+    
     try:
         result = subprocess.run(
             command,
@@ -111,7 +197,7 @@ def run_command(command: str, cwd: str = ".") -> Dict[str, Any]:
             timeout=30  # 30 second
         )
         
-        return {
+        output = {
             "success": result.returncode == 0,
             "stdout": result.stdout,
             "stderr": result.stderr,
@@ -119,7 +205,7 @@ def run_command(command: str, cwd: str = ".") -> Dict[str, Any]:
             "command": command
         }
     except subprocess.TimeoutExpired:
-        return {
+        output = {
             "success": False,
             "error": "Command timed out after 30 seconds"
         }
@@ -128,6 +214,191 @@ def run_command(command: str, cwd: str = ".") -> Dict[str, Any]:
             "success": False,
             "error": f"Error running command: {str(e)}"
         }
+    
+    changes = index.refresh() if index is not None else None
+    if changes:
+        for rel_path in changes["created"] + changes["modified"]:
+            _record_change(index.root / rel_path)
+        prefix = cwd_path.relative_to(root).as_posix()
+        changes = changes_under(changes, "" if prefix == "." else prefix)
+    if changes and any(changes.values()):
+        output["fs_changes"] = summarize_changes(changes, cwd_path)
+    return output
+
+
+@tool
+def code_outline(file_path: str) -> Dict[str, Any]:
+    """List the classes, functions and methods in a Python file with their
+    signatures and line spans. Much cheaper than read_file for finding where
+    something is defined.
+    
+    Args:
+        file_path: Path to the Python file
+        
+    Returns:
+        Dictionary with 'success', 'path', 'outline', and optional 'error' keys
+    """
+    try:
+        path = resolve_path(file_path)
+        if not path.exists():
+            return {
+                "success": False,
+                "error": f"File not found: {file_path}"
+            }
+        
+        lines, symbols = SYMBOL_CACHE.get(str(path))
+        return {
+            "success": True,
+            "path": str(path),
+            "action": "read",
+            "total_lines": len(lines),
+            "outline": format_outline(symbols) or "(no classes or functions)"
+        }
+    except SyntaxError as e:
+        return {
+            "success": False,
+            "error": f"Cannot parse {file_path}: {e.msg} (line {e.lineno})"
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Error outlining file: {str(e)}"
+        }
+
+
+@tool
+def read_symbol(file_path: str, symbol: str) -> Dict[str, Any]:
+    """Read only the source of one class, function or method from a Python file.
+    
+    Args:
+        file_path: Path to the Python file
+        symbol: Name of the definition, e.g. 'parse' or 'Parser.parse'
+        
+    Returns:
+        Dictionary with 'success', 'content', 'start_line', 'end_line', and
+        optional 'error' keys
+    """
+    try:
+        path = resolve_path(file_path)
+        if not path.exists():
+            return {
+                "success": False,
+                "error": f"File not found: {file_path}"
+            }
+        
+        lines, symbols = SYMBOL_CACHE.get(str(path))
+        match, candidates = find_symbol(symbols, symbol)
+        if match is None:
+            if candidates:
+                error = f"Ambiguous symbol '{symbol}', candidates: {', '.join(candidates)}"
+            else:
+                error = f"Symbol not found: {symbol}"
+            return {
+                "success": False,
+                "error": error
+            }
+        
+        start, end = match["start_line"], match["end_line"]
+        return {
+            "success": True,
+            "symbol": match["name"],
+            "signature": match["signature"],
+            "start_line": start,
+            "end_line": end,
+            "content": "\n".join(lines[start - 1:end])
+        }
+    except SyntaxError as e:
+        return {
+            "success": False,
+            "error": f"Cannot parse {file_path}: {e.msg} (line {e.lineno})"
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Error reading symbol: {str(e)}"
+        }
+
+
+def _no_tests(message: str) -> Dict[str, Any]:
+    # not a pass: nothing was run, so nothing was checked
+    return {
+        "success": False,
+        "files_run": 0,
+        "message": f"{message}. No tests ran, so nothing was verified."
+    }
+
+
+@tool
+def run_tests(paths: Optional[List[str]] = None, all_tests: bool = False) -> Dict[str, Any]:
+    """Run Python tests with pytest, in parallel, one process per test file.
+    
+    With no arguments, runs only the test files that import (directly or
+    indirectly) a file changed during this task, or failing that the tests
+    in the changed files' directories. Prefer this over running the whole
+    suite with run_command. If no tests are selected, 'success' is False:
+    nothing was verified.
+    
+    Args:
+        paths: Specific test files to run instead of the affected ones
+        all_tests: Run every test file in the workspace
+        
+    Returns:
+        Dictionary with 'success', 'selected', 'selected_by', 'files_run', 'files_failed',
+        'summary', 'failures' (failing tracebacks only), and optional 'message'/'error' keys
+    """
+    try:
+        root = resolve_path(".")
+        selected_by = "paths"
+        if paths:
+            # explicit paths don't need the import graph
+            files = [str(resolve_path(p).relative_to(root)) for p in paths]
+        else:
+            graph = get_import_graph(str(root))
+            with graph.lock:
+                if not graph.refresh():
+                    return {
+                        "success": False,
+                        "error": "Workspace is too large to index; pass explicit test file paths"
+                    }
+                
+                if all_tests:
+                    selected_by = "all"
+                    files = graph.test_files()
+                else:
+                    changed = []
+                    for changed_path in _changed_files.get() or ():
+                        try:
+                            changed.append(str(Path(changed_path).relative_to(root)))
+                        except ValueError:
+                            continue
+                    if not changed:
+                        return _no_tests("No files changed in this task; pass paths or all_tests=True")
+                    selected_by = "imports"
+                    files = graph.affected_tests(changed)
+                    if not files:
+                        # nothing imports the changes (data files, new modules): try nearby tests
+                        selected_by = "directory"
+                        files = graph.tests_near(changed)
+                    if not files:
+                        return _no_tests(
+                            "No tests import or sit next to the changed files; "
+                            "pass paths or all_tests=True"
+                        )
+        
+        if not files:
+            return _no_tests("No test files found for the selection")
+        
+        result = run_test_files(str(root), files)
+        result["selected"] = files
+        result["selected_by"] = selected_by
+        if selected_by == "directory":
+            result["message"] = "No tests import the changed files; ran the tests in their directories instead"
+        return result
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Error running tests: {str(e)}"
+        }
 
 
-ALL_TOOLS = [read_file, write_file, create_folder, run_command]
+ALL_TOOLS = [read_file, write_file, create_folder, run_command, code_outline, read_symbol, run_tests]
@@ -1,4 +1,5 @@
 import asyncio
+import sys
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any
@@ -14,34 +15,31 @@ from rich.text import Text
 from rich.console import Group
 from rich.markdown import Markdown
 
+from .metrics import REGISTRY, MetricsRegistry
+from .history import StepHistory, StepRecord, format_size, process_rss
+from .profiling import TaskProfiler
 from .react_agent import ReActAgent
 
 
+# color coding -- phases
+PHASE_COLORS = {
+    "think": "cyan",
+    "act": "yellow",
+    "observe": "green",
+    "complete": "bright_green",
+    "verify": "magenta",
+    "control": "blue",
+}
+
+
 class StepDisplay(Static):
-    def __init__(self, **kwargs):
+    def __init__(self, max_bytes: int = None, **kwargs):
         super().__init__(**kwargs)
-        self.steps: List[Dict[str, Any]] = []
+        self.steps = StepHistory(max_bytes)
     
     def add_step(self, phase: str, content: str, data: Dict[str, Any]):
         timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # color coding -- phases
-        phase_colors = {
-            "think": "cyan",
-            "act": "yellow",
-            "observe": "green",
-            "complete": "bright_green",
-        }
-        color = phase_colors.get(phase, "white")
-        
-        step = {
-            "timestamp": timestamp,
-            "phase": phase,
-            "content": content,
-            "data": data,
-            "color": color
-        }
-        self.steps.append(step)
+        self.steps.append(StepRecord(timestamp, phase, content, data))
         self.update_display()
     
     def update_display(self):
@@ -52,67 +50,65 @@ class StepDisplay(Static):
         lines = []
         current_iter = None
         
-        for step in self.steps[-50:]:  # TODO: last 50 steps
-            # if step.get('data', {}).get('iteration') and step['data']['iteration'] != current_iter:
-            #     current_iter = step['data']['iteration']
-            #     max_iter = step['data'].get('max_iterations', 15)
+        for step in self.steps.tail(50):  # TODO: last 50 steps
+            # if step.iteration and step.iteration != current_iter:
+            #     current_iter = step.iteration
+            #     max_iter = 15
             #     lines.append(f"\n[bold white]{'═' * 20} Iteration {current_iter}/{max_iter} {'═' * 20}[/]")
             
-            phase_label = f"[bold {step['color']}]{step['phase'].upper()}[/]"
-            time_label = f"[dim]{step['timestamp']}[/]"
+            content = self.steps.content(step)
+            phase_label = f"[bold {PHASE_COLORS.get(step.phase, 'white')}]{step.phase.upper()}[/]"
+            time_label = f"[dim]{step.timestamp}[/]"
             
             # TODO: we'll show actual thinking
-            if step['phase'] == 'think' and step['content'].startswith('Iteration'):
+            if step.phase == 'think' and content.startswith('Iteration'):
                 continue
             
             lines.append(f"{time_label} {phase_label}")
             
-            if step['phase'] == 'think' and step['content'] and not step['content'].startswith('No action'):
-                thinking_lines = step['content'].split('\n')
+            if step.phase == 'think' and content and not content.startswith('No action'):
+                thinking_lines = content.split('\n')
                 for thinking_line in thinking_lines:
                     if thinking_line.strip():
                         lines.append(f"  [italic cyan]{thinking_line.strip()}[/]")
             else:
-                lines.append(f"  {step['content']}")
+                lines.append(f"  {content}")
             
-            if step['phase'] == 'act' and 'tool' in step['data']:
-                tool_name = step['data']['tool']
-                args = step['data'].get('args', {})
-                arg_strs = []
-                for k, v in args.items():
-                    v_str = str(v)
-                    if len(v_str) > 50:
-                        v_str = v_str[:47] + "..."
-                    arg_strs.append(f"{k}={v_str}")
-                lines.append(f"  [dim]→ {tool_name}({', '.join(arg_strs)})[/]")
+            if step.tool is not None:
+                lines.append(f"  [dim]→ {step.tool}({step.args})[/]")
             
-            if step['phase'] == 'observe' and 'result' in step['data']:
-                result = step['data']['result']
-                if isinstance(result, dict) and 'success' in result:
-                    icon = "✓" if result['success'] else "✗"
-                    color = "green" if result['success'] else "red"
-                    lines.append(f"  [{color}]{icon}[/]")
+            if step.success is not None:
+                icon = "✓" if step.success else "✗"
+                color = "green" if step.success else "red"
+                lines.append(f"  [{color}]{icon}[/]")
             
             lines.append("") 
         self.update("\n".join(lines))
     
     def clear_steps(self):
-        self.steps = []
+        self.steps.clear()
         self.update_display()
 
 
 class FileDisplay(Static):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.files: Dict[str, str] = {}
+        self.files: Dict[str, Dict[str, str]] = {}
     
-    def add_file_change(self, file_path: str, action: str, content: str = ""):
+    def add_file_change(self, file_path: str, action: str, content: str = "", refresh: bool = True):
+        # keep only the rendered preview, not the file contents
+        preview = ""
+        if content and len(content) < 500:
+            preview = content[:200]
+            if len(content) > 200:
+                preview += "..."
         self.files[file_path] = {
-            "action": action,
-            "content": content,
+            "action": sys.intern(action),
+            "preview": preview,
             "timestamp": datetime.now().strftime("%H:%M:%S")
         }
-        self.update_display()
+        if refresh:
+            self.update_display()
     
     def update_display(self):
         if not self.files:
@@ -134,15 +130,20 @@ class FileDisplay(Static):
         
         created_count = sum(1 for info in self.files.values() if info['action'] == 'created')
         modified_count = sum(1 for info in self.files.values() if info['action'] == 'modified')
+        deleted_count = sum(1 for info in self.files.values() if info['action'] == 'deleted')
         
         lines = []
         if self.files:
-            lines.append(f"[bold]Modified: {modified_count} | Created: {created_count}[/]\n")
+            summary = f"Modified: {modified_count} | Created: {created_count}"
+            if deleted_count:
+                summary += f" | Deleted: {deleted_count}"
+            lines.append(f"[bold]{summary}[/]\n")
         
         for file_path, info in list(self.files.items())[-10:]:  # TODO: last 10 files
             action_colors = {
                 "created": "green",
                 "modified": "yellow",
+                "deleted": "red",
                 "read": "blue"
             }
             color = action_colors.get(info['action'], "white")
@@ -157,21 +158,12 @@ class FileDisplay(Static):
             try:
                 if Path(file_path).exists():
                     size = Path(file_path).stat().st_size
-                    if size < 1024:
-                        size_str = f"{size}B"
-                    elif size < 1024 * 1024:
-                        size_str = f"{size/1024:.1f}KB"
-                    else:
-                        size_str = f"{size/(1024*1024):.1f}MB"
-                    lines.append(f"[dim]Size: {size_str}[/]")
+                    lines.append(f"[dim]Size: {format_size(size)}[/]")
             except:
                 pass
             
-            if info['content'] and len(info['content']) < 500:
-                preview = info['content'][:200]
-                if len(info['content']) > 200:
-                    preview += "..."
-                lines.append(f"[dim]{preview}[/]")
+            if info['preview']:
+                lines.append(f"[dim]{info['preview']}[/]")
             
             lines.append("")
         
@@ -182,6 +174,20 @@ class FileDisplay(Static):
         self.update_display()
 
 
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def _sparkline(counts: List[int]) -> str:
+    peak = max(counts) if counts else 0
+    if peak == 0:
+        return SPARK_CHARS[0] * len(counts)
+    return "".join(SPARK_CHARS[min(len(SPARK_CHARS) - 1, int(c / peak * (len(SPARK_CHARS) - 1)))] for c in counts)
+
+
+def _format_seconds(value: float) -> str:
+    return f"{value * 1000:.0f}ms" if value < 1 else f"{value:.1f}s"
+
+
 class StatisticsFooter(Static):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -189,7 +195,14 @@ class StatisticsFooter(Static):
         self.tool_usage = {}
         self.total_tasks = 0
         self.completed_tasks = 0
+        self.failed_tasks = 0
         self.session_start = datetime.now()
+        self.metrics: Dict[str, Any] = {}
+        self.tool_latencies: List[tuple] = []
+    
+    def load_metrics(self, registry: MetricsRegistry):
+        self.metrics = registry.snapshot()
+        self.tool_latencies = registry.histograms_with_prefix("tool.latency.")
     
     def update_stats(self, total_tasks: int, completed_tasks: int, failed_tasks: int, 
                      total_iterations: int, tool_usage: Dict[str, int]):
@@ -229,8 +242,35 @@ class StatisticsFooter(Static):
         else:
             time_str = f"{mins}m{secs}s"
         parts.append(f"Session: {time_str}")
+        lines = [" | ".join(parts)]
+        
+        # model and throughput
+        if self.metrics:
+            gauges = self.metrics["gauges"]
+            perf = []
+            llm = self.metrics["histograms"].get("llm.latency")
+            if llm:
+                perf.append(f"[bold]⏱ LLM:[/] p50 {_format_seconds(llm['p50'])} p95 {_format_seconds(llm['p95'])}")
+            if "task.tokens_in" in gauges:
+                perf.append(
+                    f"Tokens: {gauges['task.tokens_in']:.0f}↑ {gauges['task.tokens_out']:.0f}↓ "
+                    f"({gauges.get('task.tokens_per_sec', 0):.1f} tok/s)"
+                )
+            if "prompt.tokens" in gauges:
+                perf.append(f"Prompt: {gauges['prompt.tokens']:.0f} tok/{gauges.get('prompt.messages', 0):.0f} msgs")
+            perf.append(f"Queue: {gauges.get('queue.depth', 0):.0f}")
+            perf.append(f"Throughput: {self.metrics['tasks_per_hour']:.1f} tasks/h")
+            lines.append(" | ".join(perf))
         
-        self.update(" | ".join(parts) if parts else "No statistics yet...")
+        # per-tool latency histograms
+        if self.tool_latencies:
+            tool_strs = []
+            for tool, hist in sorted(self.tool_latencies, key=lambda x: x[1]["count"], reverse=True)[:4]:
+                spark = _sparkline(list(hist["buckets"].values()))
+                tool_strs.append(f"{tool} {spark} p50 {_format_seconds(hist['p50'])}")
+            lines.append("[bold]🔧 Tools:[/] " + "  ".join(tool_strs))
+        
+        self.update("\n".join(lines) if parts else "No statistics yet...")
 
 
 class HyperCode(App):
@@ -268,6 +308,14 @@ class HyperCode(App):
         width: 100%;
     }
     
+    #stats {
+        height: auto;
+        max-height: 4;
+        background: $panel;
+        color: $text-muted;
+        padding: 0 1;
+    }
+    
     #status-bar {
         height: 1;
         background: $panel;
@@ -293,11 +341,18 @@ class HyperCode(App):
         Binding("ctrl+c", "quit_or_interrupt", "Interrupt", priority=True),
         Binding("ctrl+q", "interrupt", "Quit/Interrupt", show=False),
         Binding("ctrl+b", "toggle_right", "Toggle Right Panel"),
+        Binding("ctrl+t", "toggle_stats", "Toggle Stats"),
     ]
     
-    def __init__(self):
+    STATS_REFRESH_SECONDS = 1.0
+    
+    def __init__(self, profiler: TaskProfiler = None, history_max_bytes: int = None,
+                 metrics: MetricsRegistry = None):
         super().__init__()
         self.agent = None
+        self.profiler = profiler or TaskProfiler.from_env()
+        self.metrics = metrics or REGISTRY
+        self.history_max_bytes = history_max_bytes
         self.task_queue = deque()
         self.current_task = None
         self.task_running = False
@@ -308,6 +363,7 @@ class HyperCode(App):
         self.total_tasks_failed = 0
         self.current_iteration = 0
         self.max_iterations = 15
+        self.iteration_budget = self.max_iterations
         self.task_start_time = None
         self.session_start_time = datetime.now()
         self.tool_usage = {} 
@@ -324,7 +380,7 @@ class HyperCode(App):
                 with Vertical(id="left-panel"):
                     yield Label("Chat", classes="panel-title")
                     with VerticalScroll(id="steps-scroll"): 
-                        yield StepDisplay(id="steps")
+                        yield StepDisplay(max_bytes=self.history_max_bytes, id="steps")
                 
                 with Vertical(id="right-panel"):
                     yield Label("📁 File Changes", classes="panel-title")
@@ -335,10 +391,25 @@ class HyperCode(App):
             with Container(id="input-container"):
                 yield Input(placeholder="Enter your task here...", id="task-input")
         
+        yield StatisticsFooter(id="stats")
         yield Footer()
     
     def on_mount(self):
         self.query_one("#task-input").focus()
+        self.refresh_statistics()
+        self.set_interval(self.STATS_REFRESH_SECONDS, self.refresh_statistics)
+    
+    def refresh_statistics(self):
+        self.metrics.set_gauge("queue.depth", len(self.task_queue))
+        stats = self.query_one("#stats", StatisticsFooter)
+        stats.load_metrics(self.metrics)
+        stats.update_stats(
+            self.total_tasks_completed + self.total_tasks_failed,
+            self.total_tasks_completed,
+            self.total_tasks_failed,
+            int(stats.metrics["counters"].get("agent.iterations", 0)),
+            self.tool_usage
+        )
     
     async def on_input_submitted(self, event: Input.Submitted):
         """Handle task submission."""
@@ -346,6 +417,11 @@ class HyperCode(App):
         if not task:
             return
         
+        if task.startswith("/profile"):
+            event.input.value = ""
+            self.handle_profile_command(task.split()[1:])
+            return
+        
         # queue first
         self.task_queue.append(task)
         self.update_status()
@@ -356,6 +432,27 @@ class HyperCode(App):
         if not self.task_running:
             asyncio.create_task(self.process_queue())
     
+    def handle_profile_command(self, args: List[str]):
+        command = args[0] if args else "status"
+        if command == "start":
+            self.profiler.start()
+            if self.task_running:
+                self.notify("Profiling starts at the next iteration.")
+            else:
+                self.notify("Profiling armed for the next task.")
+        elif command == "stop":
+            self.profiler.stop()
+            if self.profiler.active:
+                self.notify("Profiling stops at the next iteration; report follows.")
+            else:
+                self.notify("Profiling disabled.")
+        elif command == "status":
+            state = "capturing" if self.profiler.active else ("armed" if self.profiler.requested else "off")
+            self.notify(f"Profiling: {state} (reports in {self.profiler.output_dir})")
+        else:
+            self.notify("Usage: /profile start|stop|status", severity="warning")
+        self.update_status()
+    
     def update_status(self):
         status_parts = []
         
@@ -364,7 +461,7 @@ class HyperCode(App):
             status_parts.append(f"[bold cyan]Task:[/] {task_display}")
             
             if self.current_iteration > 0:
-                status_parts.append(f"[yellow]Iter:[/] {self.current_iteration}/{self.max_iterations}")
+                status_parts.append(f"[yellow]Iter:[/] {self.current_iteration}/{self.iteration_budget}")
             if self.task_start_time:
                 elapsed = (datetime.now() - self.task_start_time).total_seconds()
                 mins, secs = divmod(int(elapsed), 60)
@@ -378,6 +475,18 @@ class HyperCode(App):
         if self.total_tasks_completed > 0:
             status_parts.append(f"[green]Done:[/] {self.total_tasks_completed}")
         
+        history = self.query_one("#steps", StepDisplay).steps
+        mem_str = f"hist {format_size(history.resident_bytes)}/{format_size(history.max_bytes)}"
+        if history.spilled_bytes:
+            mem_str += f" +{format_size(history.spilled_bytes)} disk"
+        rss = process_rss()
+        if rss is not None:
+            mem_str = f"{format_size(rss)} ({mem_str})"
+        status_parts.append(f"[blue]Mem:[/] {mem_str}")
+        
+        if self.profiler.active:
+            status_parts.append("[red]● PROF[/]")
+        
         status_parts.append("[dim]gemini-2.5-flash[/]")
         
         self.query_one("#status-bar").update(" | ".join(status_parts))
@@ -388,6 +497,7 @@ class HyperCode(App):
         while self.task_queue:
             self.current_task = self.task_queue.popleft()
             self.current_iteration = 0
+            self.iteration_budget = self.max_iterations
             self.task_start_time = datetime.now()
             self.update_status()
             
@@ -395,7 +505,9 @@ class HyperCode(App):
             self.query_one("#steps", StepDisplay).clear_steps()
             self.agent = ReActAgent(
                 max_iterations=self.max_iterations,
-                on_step=self.on_agent_step
+                on_step=self.on_agent_step,
+                profiler=self.profiler,
+                metrics=self.metrics
             )
             
             try:
@@ -414,6 +526,8 @@ class HyperCode(App):
                         f"⚠ Task incomplete after {result['iterations']} iterations",
                         result
                     )
+                if "profile_report" in result:
+                    self.notify(f"Profile report: {result['profile_report']}")
             except Exception as e:
                 self.total_tasks_failed += 1
                 self.on_agent_step("complete", f"✗ Error: {str(e)}", {"error": str(e)})
@@ -429,13 +543,17 @@ class HyperCode(App):
         if "iteration" in data and data["iteration"] != self.current_iteration:
             self.current_iteration = data["iteration"]
             self.update_status()
+        if phase == "control" and data.get("budget", self.iteration_budget) != self.iteration_budget:
+            self.iteration_budget = data["budget"]
+            self.update_status()
         
         step_display = self.query_one("#steps", StepDisplay)
-        step_display.add_step(phase, content, data)
+        with self.profiler.section("tui.update_display"):
+            step_display.add_step(phase, content, data)
         
         self.query_one("#steps-scroll").scroll_end(animate=True)
         if phase == "act" and "tool" in data:
-            tool_name = data["tool"]
+            tool_name = sys.intern(data["tool"])
             self.tool_usage[tool_name] = self.tool_usage.get(tool_name, 0) + 1
 
         if phase == "observe" and "result" in data:
@@ -445,10 +563,22 @@ class HyperCode(App):
                 action = result.get("action", "modified")
                 content_preview = result.get("content", "")
                 file_display.add_file_change(result["path"], action, content_preview)
+            
+            # side effects of run_command
+            if isinstance(result, dict) and "fs_changes" in result:
+                file_display = self.query_one("#files", FileDisplay)
+                changes = result["fs_changes"]
+                for action in ("created", "modified", "deleted"):
+                    for rel_path in changes.get(action, []):
+                        file_display.add_file_change(str(Path(changes["root"]) / rel_path), action, refresh=False)
+                file_display.update_display()
 
     def action_toggle_right(self):
         self.query_one("#right-panel").toggle_class("hidden")
     
+    def action_toggle_stats(self):
+        self.query_one("#stats").toggle_class("hidden")
+    
     def action_quit_or_interrupt(self):
         current_time = datetime.now().timestamp()
         
@@ -460,6 +590,8 @@ class HyperCode(App):
             self.quit_pressed_time = current_time
             
             if self.task_running:
+                if self.agent:
+                    self.agent.cancel()
                 self.task_queue.clear()
                 self.current_task = None
                 self.task_running = False
@@ -472,6 +604,8 @@ class HyperCode(App):
     def action_interrupt(self):
         # single c - quit app
         if self.task_running:
+            if self.agent:
+                self.agent.cancel()
             self.task_queue.clear()
             self.current_task = None
             self.task_running = False
@@ -480,7 +614,10 @@ class HyperCode(App):
 
 
 def main():
-    app = HyperCode()
+    profiler = TaskProfiler.from_env()
+    if "--profile" in sys.argv[1:]:
+        profiler.start()
+    app = HyperCode(profiler=profiler)
     app.run()
 
 
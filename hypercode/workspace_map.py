@@ -0,0 +1,200 @@
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .fs_journal import Signature, WorkspaceIndex, forget_indexes, get_index
+from .history import format_size
+
+
+DEFAULT_TOKEN_BUDGET = 1500
+CHARS_PER_TOKEN = 4
+MAX_TREE_DEPTH = 3
+MAX_FILES_PER_DIR = 8
+MAX_SUBDIRS_PER_DIR = 20
+MANIFEST_EXCERPT_LINES = 15
+
+MANIFEST_FILES = (
+    "pyproject.toml", "setup.py", "setup.cfg", "requirements.txt", "package.json",
+    "Cargo.toml", "go.mod", "pom.xml", "build.gradle", "Gemfile", "composer.json",
+    "Makefile", "Dockerfile", "tox.ini",
+)
+
+LANGUAGES = {
+    ".py": "Python", ".js": "JavaScript", ".jsx": "JavaScript", ".ts": "TypeScript",
+    ".tsx": "TypeScript", ".go": "Go", ".rs": "Rust", ".java": "Java", ".kt": "Kotlin",
+    ".c": "C", ".h": "C", ".cpp": "C++", ".hpp": "C++", ".cs": "C#", ".rb": "Ruby",
+    ".php": "PHP", ".swift": "Swift", ".sh": "Shell", ".html": "HTML", ".css": "CSS",
+    ".md": "Markdown", ".json": "JSON", ".yaml": "YAML", ".yml": "YAML", ".toml": "TOML",
+}
+
+
+class WorkspaceMap:
+    """Token-budgeted overview of a workspace: stats, manifests and a pruned tree.
+
+    Built from the shared WorkspaceIndex, so it is only re-rendered when the
+    index generation moves.
+    """
+
+    def __init__(self, root: str, token_budget: int = DEFAULT_TOKEN_BUDGET):
+        self.root = Path(root).resolve()
+        self.token_budget = token_budget
+        self._lock = threading.Lock()
+        self._text: Optional[str] = None
+        self._generation = -1
+        self._manifests: Dict[str, Tuple[Signature, str]] = {}
+
+    def render(self) -> str:
+        index = get_index(str(self.root))
+        if index is None:
+            return ""
+
+        with self._lock:
+            if index.refresh() is None:
+                return ""
+            # other callers (run_command, run_tests) refresh the same index and
+            # consume its changes, so compare generations rather than changes
+            with index.lock:
+                if self._text is None or index.generation != self._generation:
+                    self._text = self._build(index)
+                    self._generation = index.generation
+            return self._text
+
+    def _build(self, index: WorkspaceIndex) -> str:
+        budget = self.token_budget * CHARS_PER_TOKEN
+        files = list(index.iter_files())
+
+        languages: Dict[str, List[int]] = {}
+        total_size = 0
+        for rel, (_mtime, size, _ino) in files:
+            total_size += size
+            language = LANGUAGES.get(os.path.splitext(rel)[1].lower())
+            if language:
+                entry = languages.setdefault(language, [0, 0])
+                entry[0] += 1
+                entry[1] += size
+
+        lines = [f"Root: {self.root}", f"Files: {len(files)} ({format_size(total_size)})"]
+        if languages:
+            top = sorted(languages.items(), key=lambda x: x[1][1], reverse=True)[:6]
+            lines.append("Languages: " + ", ".join(
+                f"{name} {count} files/{format_size(size)}" for name, (count, size) in top
+            ))
+
+        # manifests get at most a third of the budget
+        manifest_lines = self._manifest_excerpts(index, budget // 3)
+        if manifest_lines:
+            lines.append("")
+            lines.extend(manifest_lines)
+
+        lines.append("")
+        lines.append("Tree:")
+        used = sum(len(line) + 1 for line in lines)
+        lines.extend(self._tree(index, budget - used))
+        return "\n".join(lines)
+
+    def _manifest_excerpts(self, index: WorkspaceIndex, budget: int) -> List[str]:
+        root_files = index.files.get("", {})
+        lines: List[str] = []
+        used = 0
+        for name in MANIFEST_FILES:
+            sig = root_files.get(name)
+            if sig is None:
+                self._manifests.pop(name, None)
+                continue
+
+            cached = self._manifests.get(name)
+            if cached is None or cached[0] != sig:
+                try:
+                    with open(self.root / name, encoding="utf-8", errors="replace") as f:
+                        head = [line.rstrip() for _, line in zip(range(MANIFEST_EXCERPT_LINES), f)]
+                except OSError:
+                    continue
+                cached = self._manifests[name] = (sig, "\n".join(f"  {line}" for line in head if line.strip()))
+
+            block = f"--- {name} ---\n{cached[1]}"
+            if used + len(block) > budget:
+                lines.append(f"--- {name} --- (omitted)")
+                continue
+            lines.append(block)
+            used += len(block) + 1
+        return lines
+
+    def _tree(self, index: WorkspaceIndex, budget: int) -> List[str]:
+        # lay out breadth-first so a tight budget keeps the top levels,
+        # then emit depth-first; each block line carries the subdir it opens
+        blocks: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+        queue = [("", 0)]
+        used = 0
+        while queue:
+            rel, depth = queue.pop(0)
+            indent = "  " * depth
+            block: List[Tuple[str, Optional[str]]] = []
+            names = sorted(index.files.get(rel, {}))
+            for name in names[:MAX_FILES_PER_DIR]:
+                block.append((f"{indent}{name}", None))
+            if len(names) > MAX_FILES_PER_DIR:
+                block.append((f"{indent}... +{len(names) - MAX_FILES_PER_DIR} more files", None))
+            subdirs = sorted(index.subdirs.get(rel, ()))
+            for name in subdirs[:MAX_SUBDIRS_PER_DIR]:
+                child = os.path.join(rel, name) if rel else name
+                block.append((f"{indent}{name}/ ({self._count_files(index, child)} files)", child))
+                if depth + 1 < MAX_TREE_DEPTH:
+                    queue.append((child, depth + 1))
+            if len(subdirs) > MAX_SUBDIRS_PER_DIR:
+                block.append((f"{indent}... +{len(subdirs) - MAX_SUBDIRS_PER_DIR} more dirs", None))
+
+            cost = sum(len(line) + 1 for line, _ in block)
+            if used + cost > budget:
+                # keep what fits of this block rather than dropping it whole
+                marker = f"{indent}... (truncated)"
+                room = budget - used - len(marker) - 1
+                kept: List[Tuple[str, Optional[str]]] = []
+                for line, child in block:
+                    if len(line) + 1 > room:
+                        break
+                    kept.append((line, child))
+                    room -= len(line) + 1
+                blocks[rel] = kept + [(marker, None)]
+                break
+            blocks[rel] = block
+            used += cost
+
+        lines: List[str] = []
+
+        def emit(rel: str):
+            for line, child in blocks.get(rel, []):
+                lines.append(line)
+                if child is not None:
+                    emit(child)
+
+        emit("")
+        return lines
+
+    def _count_files(self, index: WorkspaceIndex, rel: str) -> int:
+        count = len(index.files.get(rel, {}))
+        for name in index.subdirs.get(rel, ()):
+            count += self._count_files(index, os.path.join(rel, name) if rel else name)
+        return count
+
+
+_maps: Dict[Path, WorkspaceMap] = {}
+_maps_lock = threading.Lock()
+
+
+def get_workspace_map(root: str) -> WorkspaceMap:
+    key = Path(root).resolve()
+    with _maps_lock:
+        workspace_map = _maps.get(key)
+        if workspace_map is None:
+            workspace_map = _maps[key] = WorkspaceMap(str(key))
+    return workspace_map
+
+
+def forget_workspace_maps(root: str):
+    """Drop cached maps and indexes for ``root`` and anything below it."""
+    key = Path(root).resolve()
+    with _maps_lock:
+        for path in [path for path in _maps if path == key or path.is_relative_to(key)]:
+            del _maps[path]
+    forget_indexes(str(key))
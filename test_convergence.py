@@ -0,0 +1,94 @@
+from hypercode.convergence import PROGRESS_WINDOW, STALL_GRACE, ConvergenceController
+
+
+def act(controller, iteration, calls):
+    for name, args, result in calls:
+        controller.record_tool(name, args, result)
+    return controller.end_iteration(iteration, has_text=True, has_tool_calls=bool(calls))
+
+
+def test_text_only_turn_after_tools_completes():
+    controller = ConvergenceController(max_iterations=10)
+    assert act(controller, 1, [("read_file", {"file_path": "a.py"}, {"success": True})])["action"] == "continue"
+
+    assert controller.end_iteration(2, has_text=True, has_tool_calls=False)["action"] == "complete"
+
+
+def test_plan_only_first_turn_is_redirected_once():
+    controller = ConvergenceController(max_iterations=10)
+
+    decision = controller.end_iteration(1, has_text=True, has_tool_calls=False)
+    assert decision["action"] == "redirect"
+    assert "same turn" in decision["message"]
+    # the model confirmed no changes are needed
+    assert controller.end_iteration(2, has_text=True, has_tool_calls=False)["action"] == "complete"
+
+
+def test_repeated_calls_redirect_then_stop():
+    controller = ConvergenceController(max_iterations=10)
+    call = [("run_command", {"command": "ls"}, {"success": True, "stdout": "a.py"})]
+
+    assert act(controller, 1, call)["action"] == "continue"
+    assert act(controller, 2, call)["action"] == "redirect"
+    assert act(controller, 3, call)["action"] == "stop"
+
+
+def test_redirect_is_per_repeated_iteration():
+    controller = ConvergenceController(max_iterations=10)
+    read = [("read_file", {"file_path": "a.py"}, {"success": True, "content": "x = 1"})]
+    run = [("run_command", {"command": "ls"}, {"success": True, "stdout": "a.py"})]
+
+    assert act(controller, 1, read)["action"] == "continue"
+    assert act(controller, 2, read)["action"] == "redirect"
+    assert act(controller, 3, run)["action"] == "continue"
+    # a different repeat gets its own redirect rather than stopping the run
+    assert act(controller, 4, run)["action"] == "redirect"
+    assert act(controller, 5, read)["action"] == "stop"
+
+
+def test_same_calls_with_different_results_are_not_a_loop():
+    controller = ConvergenceController(max_iterations=10)
+
+    for iteration in range(1, 4):
+        result = {"success": True, "stdout": f"run {iteration}"}
+        decision = act(controller, iteration, [("run_command", {"command": "pytest"}, result)])
+        assert decision["action"] == "continue"
+
+
+def test_empty_turns_stop_the_run():
+    controller = ConvergenceController(max_iterations=10)
+
+    assert controller.end_iteration(1, has_text=False, has_tool_calls=False)["action"] == "continue"
+    assert controller.end_iteration(2, has_text=False, has_tool_calls=False)["action"] == "stop"
+
+
+def test_budget_extends_on_steady_progress():
+    controller = ConvergenceController(max_iterations=4)
+
+    for iteration in range(1, 4):
+        decision = act(controller, iteration, [("write_file", {"n": iteration}, {"success": True})])
+    assert decision["budget"] > 4
+    assert decision["budget"] <= controller.hard_limit
+
+
+
+def test_budget_shrinks_when_no_new_results():
+    controller = ConvergenceController(max_iterations=20)
+    failing = {"success": False, "stdout": "1 failed"}
+
+    assert act(controller, 1, [("run_command", {"command": "pytest"}, failing)])["budget"] == 20
+    # different commands, same failure: no fingerprint repeats, but nothing new either
+    for iteration in range(2, 2 + PROGRESS_WINDOW):
+        command = f"pytest -k case{iteration}"
+        decision = act(controller, iteration, [("run_command", {"command": command}, failing)])
+        assert decision["action"] == "continue"
+    assert decision["budget"] == iteration + STALL_GRACE
+
+
+def test_new_writes_count_as_progress():
+    controller = ConvergenceController(max_iterations=20)
+
+    for iteration in range(1, 1 + PROGRESS_WINDOW):
+        args = {"file_path": "a.py", "content": f"x = {iteration}"}
+        decision = act(controller, iteration, [("write_file", args, {"success": True, "path": "a.py"})])
+    assert decision["budget"] == 20
@@ -0,0 +1,70 @@
+import pytest
+
+from hypercode.fs_journal import WorkspaceIndex, changes_under
+
+
+@pytest.fixture(params=[True, False], ids=["inotify", "rescan"])
+def index(request, tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "mod.py").write_text("x = 1\n")
+    (tmp_path / "README.md").write_text("readme\n")
+    index = WorkspaceIndex(str(tmp_path), watch=request.param)
+    assert index.refresh() == {"created": [], "modified": [], "deleted": []}
+    return index
+
+
+def test_refresh_reports_created_files(index, tmp_path):
+    (tmp_path / "new.txt").write_text("new")
+    (tmp_path / "pkg" / "sub").mkdir()
+    (tmp_path / "pkg" / "sub" / "deep.py").write_text("")
+
+    changes = index.refresh()
+    assert sorted(changes["created"]) == ["new.txt", "pkg/sub/deep.py"]
+    assert changes["modified"] == [] and changes["deleted"] == []
+
+
+def test_refresh_reports_modified_files(index, tmp_path):
+    (tmp_path / "pkg" / "mod.py").write_text("x = 22\n")
+
+    changes = index.refresh()
+    assert changes["modified"] == ["pkg/mod.py"]
+    assert index.refresh() == {"created": [], "modified": [], "deleted": []}
+
+
+def test_refresh_reports_deleted_files(index, tmp_path):
+    (tmp_path / "README.md").unlink()
+
+    assert index.refresh()["deleted"] == ["README.md"]
+
+
+def test_refresh_reports_files_of_removed_directory(index, tmp_path):
+    (tmp_path / "pkg" / "mod.py").unlink()
+    (tmp_path / "pkg").rmdir()
+
+    changes = index.refresh()
+    assert changes["deleted"] == ["pkg/mod.py"]
+    assert "pkg" not in index.files
+
+
+def test_ignored_directories_are_not_indexed(index, tmp_path):
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__" / "mod.pyc").write_bytes(b"")
+
+    assert index.refresh()["created"] == []
+
+
+def test_changes_under_filters_and_rebases():
+    changes = {"created": ["pkg/a.py", "other/b.py"], "modified": ["pkg/sub/c.py"], "deleted": []}
+
+    assert changes_under(changes, "pkg") == {"created": ["a.py"], "modified": ["sub/c.py"], "deleted": []}
+    assert changes_under(changes, "") == changes
+
+
+def test_generation_advances_only_on_changes(index, tmp_path):
+    generation = index.generation
+    index.refresh()
+    assert index.generation == generation
+
+    (tmp_path / "new.txt").write_text("new")
+    index.refresh()
+    assert index.generation == generation + 1
@@ -0,0 +1,58 @@
+from hypercode.history import StepHistory, StepRecord
+
+
+def make_record(i: int) -> StepRecord:
+    return StepRecord("12:00:00", "think", f"step {i} " + "x" * 200, {"iteration": i})
+
+
+def test_spilled_records_read_back_across_evictions():
+    history = StepHistory(max_bytes=1000)
+    originals = []
+    for i in range(20):
+        record = make_record(i)
+        originals.append(record.content)
+        history.append(record)
+
+    assert history.spilled_bytes > 0
+    assert history.resident_bytes <= history.max_bytes
+    assert history.resident_bytes == sum(record.payload_size() for record in history)
+    # oldest first, and the newest record always stays resident
+    assert history.records[0].content is None
+    assert history.records[-1].content is not None
+    assert history._spill_cursor == sum(record.content is None for record in history)
+    assert [history.content(record) for record in history] == originals
+
+
+def test_records_under_the_cap_stay_resident():
+    history = StepHistory(max_bytes=10_000)
+    for i in range(3):
+        history.append(make_record(i))
+
+    assert history.spilled_bytes == 0
+    assert history._spill_file is None
+    assert all(record.spill is None for record in history)
+
+
+def test_clear_closes_the_spill_file():
+    history = StepHistory(max_bytes=500)
+    for i in range(5):
+        history.append(make_record(i))
+    spill_file = history._spill_file
+    assert spill_file is not None
+
+    history.clear()
+
+    assert spill_file.closed
+    assert history._spill_file is None
+    assert (len(history), history.resident_bytes, history.spilled_bytes, history._spill_cursor) == (0, 0, 0, 0)
+    history.append(make_record(0))
+    assert history.content(history.records[0]).startswith("step 0")
+
+
+def test_step_record_keeps_only_rendered_fields():
+    act = StepRecord("12:00:00", "act", "calling", {"tool": "write_file", "args": {"content": "y" * 100}})
+    observe = StepRecord("12:00:01", "observe", "done", {"result": {"success": False, "stdout": "z" * 1000}})
+
+    assert act.tool == "write_file"
+    assert act.args == "content=" + "y" * 47 + "..."
+    assert observe.success is False
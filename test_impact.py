@@ -0,0 +1,66 @@
+import pytest
+
+from hypercode.fs_journal import forget_indexes, get_index
+from hypercode.impact import ImportGraph, _imports
+
+
+@pytest.fixture
+def graph(tmp_path):
+    files = {
+        "src/pkg/__init__.py": "from .core import run\n",
+        "src/pkg/core.py": "from . import util\n",
+        "src/pkg/util.py": "import os\n",
+        "src/other.py": "",
+        "tests/conftest.py": "",
+        "tests/test_core.py": "from pkg.core import run\n",
+        "tests/test_util.py": "import pkg.util\n",
+        "tests/test_other.py": "import other\n",
+        "tests/unit/conftest.py": "",
+        "tests/unit/test_misc.py": "",
+    }
+    for rel, source in files.items():
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text(source)
+    graph = ImportGraph(str(tmp_path))
+    assert graph.refresh()
+    yield graph
+    forget_indexes(str(tmp_path))
+
+
+def test_imports_include_parent_packages():
+    assert _imports("import a.b.c\n", "mod.py") == {"a", "a.b", "a.b.c"}
+    assert _imports("from .sub import x\n", "pkg/mod.py") == {"pkg", "pkg.sub", "pkg.sub.x"}
+
+
+def test_changed_module_selects_direct_and_transitive_importers(graph):
+    assert graph.affected_tests(["src/pkg/util.py"]) == ["tests/test_core.py", "tests/test_util.py"]
+    assert graph.affected_tests(["src/other.py"]) == ["tests/test_other.py"]
+
+
+def test_changed_package_init_selects_tests_importing_its_submodules(graph):
+    assert graph.affected_tests(["src/pkg/__init__.py"]) == ["tests/test_core.py", "tests/test_util.py"]
+
+
+def test_changed_conftest_selects_tests_below_it(graph):
+    assert graph.affected_tests(["tests/unit/conftest.py"]) == ["tests/unit/test_misc.py"]
+    assert graph.affected_tests(["tests/conftest.py"]) == graph.test_files()
+
+
+def test_changed_test_file_selects_itself(graph):
+    assert graph.affected_tests(["tests/test_other.py"]) == ["tests/test_other.py"]
+    assert graph.affected_tests(["README.md"]) == []
+
+
+def test_tests_near_falls_back_to_directory(graph):
+    assert graph.affected_tests(["tests/unit/data.json"]) == []
+    assert graph.tests_near(["tests/unit/data.json"]) == ["tests/unit/test_misc.py"]
+    # root-level changes would select the whole suite
+    assert graph.tests_near(["setup.cfg"]) == []
+
+
+def test_refresh_sees_changes_consumed_by_another_caller(graph, tmp_path):
+    (tmp_path / "tests" / "test_new.py").write_text("import other\n")
+    get_index(str(tmp_path)).refresh()
+
+    graph.refresh()
+    assert "tests/test_new.py" in graph.affected_tests(["src/other.py"])
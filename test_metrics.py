@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from hypercode import metrics
+from hypercode.metrics import Histogram, MetricsRegistry
+
+
+def test_percentile_uses_nearest_rank_on_the_window():
+    histogram = Histogram()
+    assert histogram.percentile(50) == 0.0
+
+    for value in range(1, 101):
+        histogram.observe(float(value))
+
+    assert histogram.percentile(0) == 1.0
+    assert histogram.percentile(50) == 51.0  # index round(49.5) == 50
+    assert histogram.percentile(95) == 95.0
+    assert histogram.percentile(100) == 100.0
+
+
+def test_percentile_only_sees_the_window_but_totals_see_everything():
+    histogram = Histogram(window=3)
+    for value in (100.0, 1.0, 2.0, 3.0):
+        histogram.observe(value)
+
+    assert histogram.percentile(100) == 3.0
+    assert histogram.count == 4
+    assert histogram.total == 106.0
+
+
+def test_bucket_edges_are_inclusive_with_an_overflow_bucket():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 1.0, 1.5, 100.0):
+        histogram.observe(value)
+
+    assert histogram.bucket_counts == [2, 2, 2]
+    assert histogram.snapshot()["buckets"] == {"0.1": 2, "1.0": 2, "inf": 2}
+
+
+def test_tasks_per_hour_floors_elapsed_time_at_a_minute(monkeypatch):
+    registry = MetricsRegistry()
+    registry.inc("tasks.completed")
+    registry.inc("tasks.failed")
+
+    monkeypatch.setattr(metrics.time, "time", lambda: registry.started + 1)
+    assert registry.tasks_per_hour() == pytest.approx(120.0)
+
+    monkeypatch.setattr(metrics.time, "time", lambda: registry.started + 1800)
+    assert registry.tasks_per_hour() == pytest.approx(4.0)
+
+
+def test_dump_json_writes_a_snapshot(tmp_path):
+    registry = MetricsRegistry()
+    registry.inc("tasks.completed")
+    registry.set_gauge("queue.depth", 2)
+    registry.observe("tool.read_file", 0.2)
+    path = tmp_path / "out" / "metrics.json"
+
+    registry.dump_json(str(path))
+
+    data = json.loads(path.read_text())
+    assert data["counters"] == {"tasks.completed": 1}
+    assert data["gauges"] == {"queue.depth": 2}
+    assert data["histograms"]["tool.read_file"]["count"] == 1
+    assert data["histograms"]["tool.read_file"]["buckets"]["0.25"] == 1
+    assert "tasks_per_hour" in data
+
+
+def test_histograms_with_prefix_strips_the_prefix():
+    registry = MetricsRegistry()
+    registry.observe("tool.read_file", 0.1)
+    registry.observe("llm.invoke", 1.0)
+
+    assert [name for name, _ in registry.histograms_with_prefix("tool.")] == ["read_file"]
@@ -0,0 +1,123 @@
+import pytest
+
+from hypercode import speculative
+from hypercode.speculative import SpeculativeRun, merge_back
+
+
+def empty_changes(**changes):
+    return {"created": [], "modified": [], "deleted": [], **changes}
+
+
+@pytest.fixture
+def trees(tmp_path):
+    clone, source = tmp_path / "clone", tmp_path / "source"
+    clone.mkdir()
+    source.mkdir()
+    return clone, source
+
+
+def test_merge_back_copies_and_deletes(trees):
+    clone, source = trees
+    (source / "old.txt").write_text("old")
+    (source / "mod.py").write_text("x = 1\n")
+    (clone / "mod.py").write_text("x = 2\n")
+    (clone / "pkg").mkdir()
+    (clone / "pkg" / "new.py").write_text("")
+
+    merge_back(clone, source, empty_changes(created=["pkg/new.py"], modified=["mod.py"], deleted=["old.txt"]))
+
+    assert (source / "mod.py").read_text() == "x = 2\n"
+    assert (source / "pkg" / "new.py").exists()
+    assert not (source / "old.txt").exists()
+
+
+def test_merge_back_replaces_file_with_directory(trees):
+    clone, source = trees
+    (source / "foo").write_text("file")
+    (clone / "foo").mkdir()
+    (clone / "foo" / "x").write_text("x")
+
+    merge_back(clone, source, empty_changes(created=["foo/x"], deleted=["foo"]))
+
+    assert (source / "foo" / "x").read_text() == "x"
+
+
+def test_merge_back_replaces_directory_with_file(trees):
+    clone, source = trees
+    (source / "foo").mkdir()
+    (source / "foo" / "x").write_text("x")
+    (source / "foo" / "__pycache__").mkdir()
+    (clone / "foo").write_text("file")
+
+    merge_back(clone, source, empty_changes(created=["foo"], deleted=["foo/x"]))
+
+    assert (source / "foo").read_text() == "file"
+    assert not (source / "foo" / "foo").exists()
+
+
+def test_merge_back_prunes_emptied_directories(trees):
+    clone, source = trees
+    (source / "a" / "b").mkdir(parents=True)
+    (source / "a" / "b" / "x.py").write_text("")
+    (source / "kept").mkdir()
+    (source / "kept" / "y.py").write_text("")
+    (clone / "kept").mkdir()
+
+    merge_back(clone, source, empty_changes(deleted=["a/b/x.py", "kept/y.py"]))
+
+    assert not (source / "a").exists()
+    assert (source / "kept").is_dir()
+
+
+class FakeAgent:
+    def __init__(self, workspace, **kwargs):
+        self.workspace = workspace
+
+    def cancel(self):
+        pass
+
+    def run(self, task):
+        with open(f"{self.workspace}/result.txt", "w") as f:
+            f.write(task)
+        return {"success": True, "iterations": 1}
+
+
+def test_failed_merge_is_not_reported_as_success(tmp_path, monkeypatch):
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+
+    def failing_merge(clone, source, changes):
+        raise PermissionError("read-only workspace")
+
+    monkeypatch.setattr(speculative, "ReActAgent", FakeAgent)
+    monkeypatch.setattr(speculative, "merge_back", failing_merge)
+    result = SpeculativeRun("true", attempts=1, workspace=str(workspace)).run("done")
+
+    assert result["success"] is False
+    assert "read-only workspace" in result["result"]
+    kept = result["attempts"][0]["kept_clone"]
+    assert open(f"{kept}/result.txt").read() == "done"
+
+
+def test_verified_attempt_is_merged(tmp_path, monkeypatch):
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+
+    monkeypatch.setattr(speculative, "ReActAgent", FakeAgent)
+    result = SpeculativeRun("test -f result.txt", attempts=2, workspace=str(workspace)).run("done")
+
+    assert result["success"] is True
+    assert (workspace / "result.txt").read_text() == "done"
+
+
+def test_clone_shares_dependency_dirs(tmp_path):
+    source = tmp_path / "source"
+    (source / ".venv" / "bin").mkdir(parents=True)
+    (source / ".git").mkdir()
+    (source / "mod.py").write_text("x = 1\n")
+
+    speculative.clone_workspace(source, tmp_path / "clone")
+
+    assert (tmp_path / "clone" / ".venv").is_symlink()
+    assert not (tmp_path / "clone" / ".git").exists()
+    assert (tmp_path / "clone" / "mod.py").read_text() == "x = 1\n"
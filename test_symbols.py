@@ -0,0 +1,70 @@
+from hypercode.symbols import SymbolCache, find_symbol, parse_symbols
+
+
+SOURCE = '''\
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from os import PathLike
+
+try:
+    from json import loads
+except ImportError:
+    def loads(text):
+        return text
+
+
+class Config:
+    if sys.version_info >= (3, 11):
+        def parse(self):
+            return 1
+    else:
+        def parse(self):
+            return 0
+
+    @property
+    def name(self) -> str:
+        return "config"
+
+
+with open(__file__) as f:
+    def reader():
+        return f
+'''
+
+
+def test_parse_symbols_qualifies_and_spans():
+    symbols = {s["name"]: s for s in parse_symbols(SOURCE)}
+
+    assert symbols["Config"]["kind"] == "class"
+    assert symbols["Config.name"]["kind"] == "method"
+    assert symbols["Config.name"]["signature"] == "def name(self) -> str"
+    # decorators are part of the span
+    assert symbols["Config.name"]["start_line"] == 22
+
+
+def test_parse_symbols_finds_definitions_in_compound_statements():
+    names = [s["name"] for s in parse_symbols(SOURCE)]
+
+    assert names.count("loads") == 1
+    assert names.count("Config.parse") == 2
+    assert "reader" in names
+    symbol, _ = find_symbol(parse_symbols(SOURCE), "reader")
+    assert symbol["kind"] == "function"
+
+
+def test_find_symbol_reports_ambiguous_bare_names():
+    symbols = parse_symbols("class A:\n    def run(self): pass\n\nclass B:\n    def run(self): pass\n")
+
+    assert find_symbol(symbols, "B.run")[0]["start_line"] == 5
+    assert find_symbol(symbols, "run") == (None, ["A.run", "B.run"])
+
+
+def test_cache_lines_follow_ast_line_numbers(tmp_path):
+    path = tmp_path / "mod.py"
+    path.write_text("def a():\n    x = 1\n\x0c\n    return x\n\n\ndef b():\n    pass\n")
+
+    lines, symbols = SymbolCache().get(str(path))
+    symbol, _ = find_symbol(symbols, "b")
+    assert lines[symbol["start_line"] - 1:symbol["end_line"]] == ["def b():", "    pass"]
@@ -0,0 +1,62 @@
+import pytest
+
+from hypercode.fs_journal import get_index
+from hypercode.workspace_map import (
+    CHARS_PER_TOKEN, MAX_SUBDIRS_PER_DIR, WorkspaceMap, forget_workspace_maps,
+)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = \"demo\"\n")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.py").write_text("print('hi')\n")
+    yield tmp_path
+    forget_workspace_maps(str(tmp_path))
+
+
+def test_map_lists_manifests_and_tree(workspace):
+    text = WorkspaceMap(str(workspace)).render()
+
+    assert "Files: 2" in text
+    assert 'name = "demo"' in text
+    assert "src/ (1 files)" in text
+    assert "  main.py" in text
+
+
+def test_map_stays_within_budget_with_many_directories(workspace):
+    for i in range(500):
+        (workspace / f"dir{i:03}").mkdir()
+        (workspace / f"dir{i:03}" / "mod.py").write_text("")
+
+    for token_budget in (200, 80):
+        text = WorkspaceMap(str(workspace), token_budget=token_budget).render()
+        assert len(text) <= token_budget * CHARS_PER_TOKEN
+        # the root block is cut inside, not replaced wholesale
+        assert "dir000/ (1 files)" in text.split("Tree:\n", 1)[1]
+
+    assert f"... +{501 - MAX_SUBDIRS_PER_DIR} more dirs" in WorkspaceMap(str(workspace), token_budget=200).render()
+    assert text.endswith("... (truncated)")
+
+
+def test_subdirectories_are_capped_per_directory(workspace):
+    for i in range(MAX_SUBDIRS_PER_DIR + 5):
+        (workspace / f"dir{i:03}").mkdir()
+        (workspace / f"dir{i:03}" / "mod.py").write_text("")
+
+    text = WorkspaceMap(str(workspace), token_budget=5000).render()
+
+    # 25 new dirs plus src/
+    assert "... +6 more dirs" in text
+    assert "dir024/" not in text
+
+
+def test_map_rebuilds_after_another_caller_consumed_changes(workspace):
+    workspace_map = WorkspaceMap(str(workspace))
+    assert "added.py" not in workspace_map.render()
+
+    (workspace / "src" / "added.py").write_text("")
+    # run_command refreshes the same shared index and takes the changes
+    assert get_index(str(workspace)).refresh()["created"] == ["src/added.py"]
+
+    assert "added.py" in workspace_map.render()